@@ -0,0 +1,91 @@
+import random
+import string
+
+CATEGORIES = ["filesystem", "strings", "filters", "math", "network", "system"]
+SHAPES = ["int", "string", "path", "list<string>", "duration"]
+
+
+def _word(rng: random.Random, size: int = 6) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=size))
+
+
+def _sentence(rng: random.Random, words: int = 8) -> str:
+    return " ".join(_word(rng, rng.randint(2, 9)) for _ in range(words)).capitalize()
+
+
+def docpage(flags: int = 8, examples: int = 8, seed: int = 0) -> tuple[str, str]:
+    """
+    Generate a synthetic docpage as the crawler renders it, along with its command.
+
+    The page has the layout of the Nushell documentation website: navigation
+    before the title, sections that the cleaner drops, flags with short forms
+    and examples using combined short flags, quoted arguments and pipes.
+    """
+    rng = random.Random(seed)
+    command = f"{_word(rng)} {_word(rng, 4)}"
+
+    # Short forms are unique letters, with at most one per letter
+    letters = rng.sample(string.ascii_letters, k=min(flags, len(string.ascii_letters)))
+    names = [f"{_word(rng)}-{_word(rng, 4)}" for _ in range(flags)]
+    shorts = letters + [None] * (flags - len(letters))
+
+    lines = [
+        "[Skip to content](#main)",
+        "  * [Book](/book/)",
+        "  * [Commands](/commands/)",
+        "",
+        f"# `{command}` for {rng.choice(CATEGORIES)}",
+        "",
+        _sentence(rng, 12),
+        "",
+        "## Signature",
+        "",
+        f"```> {command} {{flags}} (path)```",
+        "",
+        "## Flags",
+        "",
+    ]
+    for name, short in zip(names, shorts, strict=True):
+        spec = f"--{name}" + (f", -{short}" if short else "")
+        if rng.random() < 0.5:
+            spec += f" {{{rng.choice(SHAPES)}}}"
+        lines.append(f" -  `{spec}`: {_sentence(rng)}")
+
+    lines += ["", "## Parameters", "", f" -  `path`: {_sentence(rng)}", ""]
+    lines += [
+        "## Input/output types:",
+        "",
+        "input | output",
+        "---|---",
+        "any | any",
+        "",
+    ]
+
+    lines += ["## Examples", ""]
+    for _ in range(examples):
+        tokens = [command]
+        used = [short for short in shorts if short]
+        if used and rng.random() < 0.5:
+            tokens.append("-" + "".join(rng.sample(used, k=min(len(used), 3))))
+        for name in rng.sample(names, k=min(len(names), 2)):
+            tokens.append(f"--{name}")
+        tokens.append(rng.choice([_word(rng), f"'{_sentence(rng, 3)}'", "*.rs"]))
+        if rng.random() < 0.2:
+            tokens += ["|", "length"]
+
+        lines += [
+            _sentence(rng, 6),
+            "```nu",
+            f"> {' '.join(tokens)}",
+            _sentence(rng, 4),
+            "```",
+            "",
+        ]
+
+    lines += ["## Notes", "", _sentence(rng, 20), "", "[Edit this page](/edit)"]
+    return command, "\n".join(lines)
+
+
+def docpages(count: int, flags: int = 8, examples: int = 8, seed: int = 0) -> list[str]:
+    """Generate `count` distinct synthetic docpages of the same shape."""
+    return [docpage(flags, examples, seed + i)[1] for i in range(count)]
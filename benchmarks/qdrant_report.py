@@ -0,0 +1,146 @@
+import asyncio
+import statistics
+import time
+
+import click
+from loguru import logger
+import numpy as np
+from qdrant_client import AsyncQdrantClient, models
+
+from config import settings
+from rag.infrastructure.qdrant_config import search_params
+from rag.infrastructure.utils import connect_qdrant
+
+# Noise added to the stored vectors to make queries that are close to them,
+# without being them, as the queries of users are
+NOISE = 0.05
+
+# Queries run before timing, so connections are open when it starts
+WARMUP = 5
+
+
+async def _sample(
+    client: AsyncQdrantClient, collection_name: str, queries: int, seed: int
+) -> np.ndarray:
+    points, _ = await client.scroll(
+        collection_name=collection_name,
+        limit=queries,
+        with_payload=False,
+        with_vectors=True,
+    )
+    vectors = np.array([point.vector for point in points], dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    return vectors + rng.normal(0, NOISE, vectors.shape).astype(np.float32)
+
+
+async def _search(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    queries: np.ndarray,
+    k: int,
+    params: models.SearchParams | None,
+) -> tuple[list[set[str]], list[float]]:
+    """Run the queries one by one, as the CLI does, timing every one of them."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        response = await client.query_points(
+            collection_name=collection_name,
+            query=query.tolist(),
+            limit=k,
+            search_params=params,
+            with_payload=False,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({str(point.id) for point in response.points})
+    return results, latencies
+
+
+def _percentiles(latencies: list[float]) -> tuple[float, float]:
+    if len(latencies) < 2:
+        return latencies[0], latencies[0]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[98]
+
+
+async def _timed(
+    prefer_grpc: bool,
+    collection_name: str,
+    queries: np.ndarray,
+    k: int,
+    params: models.SearchParams | None,
+) -> tuple[list[set[str]], list[float]]:
+    """
+    Time the queries over one transport, on a client whose connection
+    is already open, as the long-lived client of the CLI is.
+    """
+    client = connect_qdrant(prefer_grpc)
+    try:
+        await _search(client, collection_name, queries[:WARMUP], k, params)
+        return await _search(client, collection_name, queries, k, params)
+    finally:
+        await client.close()
+
+
+async def report(queries: int, k: int, seed: int, grpc: bool) -> None:
+    collection_name = settings.QDRANT_COLLECTION_NAME
+    client = connect_qdrant(prefer_grpc=False)
+    try:
+        info = await client.get_collection(collection_name)
+        sample = await _sample(client, collection_name, queries, seed)
+        if not len(sample):
+            raise click.ClickException(f"Collection '{collection_name}' is empty.")
+
+        # Exact search is the ground truth the configured search is measured against
+        exact, exact_latencies = await _search(
+            client, collection_name, sample, k, models.SearchParams(exact=True)
+        )
+    finally:
+        await client.close()
+
+    latencies = {"exact": exact_latencies}
+    approx, latencies["REST"] = await _timed(
+        False, collection_name, sample, k, search_params()
+    )
+    if grpc:
+        _, latencies["gRPC"] = await _timed(
+            True, collection_name, sample, k, search_params()
+        )
+
+    recall = statistics.fmean(
+        len(found & truth) / len(truth)
+        for found, truth in zip(approx, exact, strict=True)
+        if truth
+    )
+
+    logger.info(
+        f"Collection '{collection_name}': {info.points_count} points, "
+        f"hnsw m={settings.QDRANT_HNSW_M} ef_construct={settings.QDRANT_HNSW_EF_CONSTRUCT} "
+        f"ef={settings.QDRANT_HNSW_EF or 'default'}, "
+        f"quantization={settings.QDRANT_QUANTIZATION or 'none'}, "
+        f"on-disk vectors={settings.QDRANT_ON_DISK_VECTORS}"
+    )
+    for name, timings in latencies.items():
+        p50, p99 = _percentiles(timings)
+        logger.info(f"{name:>5}: p50 {p50:7.2f} ms, p99 {p99:7.2f} ms")
+    logger.info(f"recall@{k}: {recall:.3f} over {len(sample)} queries")
+
+
+@click.command()
+@click.option(
+    "--queries", default=200, help="Number of queries, sampled from the points"
+)
+@click.option("-k", default=10, help="Number of neighbours retrieved by each query")
+@click.option("--seed", default=0, help="Seed of the noise added to the queries")
+@click.option("--grpc/--no-grpc", default=True, help="Time the queries over gRPC too")
+def main(queries: int, k: int, seed: int, grpc: bool):
+    """
+    Recall and latency of the Qdrant collection with the configured
+    HNSW, quantization and storage settings, against exact search,
+    over REST and gRPC.
+    """
+    asyncio.run(report(queries, k, seed, grpc))
+
+
+if __name__ == "__main__":
+    main()
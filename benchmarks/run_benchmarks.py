@@ -0,0 +1,169 @@
+from collections.abc import Callable
+import json
+from pathlib import Path
+import time
+import tracemalloc
+
+import click
+from docpages import docpages
+from loguru import logger
+
+from etl.domain.services import MarkdownCleanerService
+from rag.domain.services.docpage_parser import DocpageParser
+from rag.domain.services.raw_docpage_parser import RawDocpageParser
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+# Throughput below the baseline by more than this fraction is a regression
+THRESHOLD = 0.2
+
+# Name of the case, then the number of flags and examples of its docpages
+CASES = {
+    "small": (2, 2),
+    "medium": (12, 12),
+    "large": (48, 48),
+}
+
+
+def _clean(doc: str) -> str:
+    return MarkdownCleanerService(doc).clean()
+
+
+def _parse(doc: str):
+    return DocpageParser().parse(doc)
+
+
+def _clean_and_parse(doc: str):
+    return DocpageParser().parse(MarkdownCleanerService(doc).clean())
+
+
+def _parse_raw(doc: str):
+    return RawDocpageParser().parse_raw(doc)
+
+
+# Name of the benchmark, then the function it times and how its input is prepared
+BENCHMARKS: dict[str, tuple[Callable, Callable[[list[str]], list[str]]]] = {
+    "cleaner": (_clean, lambda raw_docs: raw_docs),
+    "parser": (_parse, lambda raw_docs: [_clean(doc) for doc in raw_docs]),
+    # Raw docpage to command, in two stages then fused in a single pass
+    "two-stage": (_clean_and_parse, lambda raw_docs: raw_docs),
+    "fused": (_parse_raw, lambda raw_docs: raw_docs),
+}
+
+
+def measure(func: Callable, docs: list[str], rounds: int) -> dict:
+    """
+    Time the function over all documents, keeping the best of the rounds,
+    then run it once more under tracemalloc for its peak memory.
+    """
+    size = sum(len(doc.encode()) for doc in docs)
+
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for doc in docs:
+            func(doc)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for doc in docs:
+        func(doc)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "docs_per_s": round(len(docs) / best, 1),
+        "mb_per_s": round(size / best / 1e6, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Return the benchmarks whose throughput regressed beyond the threshold,
+    and those missing from the baseline, which would never be checked.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            regressions.append(f"{name}: not in the baseline, use --save-baseline")
+            continue
+        expected = baseline[name]["docs_per_s"]
+        if result["docs_per_s"] < expected * (1 - threshold):
+            regressions.append(
+                f"{name}: regressed to {result['docs_per_s']} docs/s, "
+                f"baseline {expected} docs/s"
+            )
+    return regressions
+
+
+@click.command(
+    help="""Benchmark the docpage cleaner and parser on synthetic docpages.
+
+Throughput is compared to the baseline and the command fails on a regression.
+Baselines depend on the machine: save one on the machine you compare on.
+
+Example:
+
+    uv run benchmarks/run_benchmarks.py --docs 200 --rounds 5
+
+    uv run benchmarks/run_benchmarks.py --save-baseline
+"""
+)
+@click.option("--docs", default=200, show_default=True, help="Docpages per case.")
+@click.option("--rounds", default=5, show_default=True, help="Timed rounds per case.")
+@click.option(
+    "--threshold",
+    default=THRESHOLD,
+    show_default=True,
+    help="Fraction of the baseline throughput that may be lost.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False),
+    default=str(BASELINE_FILE),
+    show_default=True,
+    help="Path to the baseline file.",
+)
+@click.option(
+    "--save-baseline",
+    is_flag=True,
+    default=False,
+    help="Save the results as the new baseline instead of comparing to it.",
+)
+def run_benchmarks(
+    docs: int, rounds: int, threshold: float, baseline: str, save_baseline: bool
+):
+    results = {}
+    for case, (flags, examples) in CASES.items():
+        raw_docs = docpages(docs, flags, examples)
+        for benchmark, (func, prepare) in BENCHMARKS.items():
+            name = f"{benchmark}/{case}"
+            results[name] = measure(func, prepare(raw_docs), max(1, rounds))
+            logger.info(
+                f"{name:<16} {results[name]['docs_per_s']:>10} docs/s "
+                f"{results[name]['mb_per_s']:>8} MB/s "
+                f"{results[name]['peak_kb']:>10} KiB peak"
+            )
+
+    baseline_path = Path(baseline)
+    if save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        logger.success(f"Baseline saved to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        logger.warning(f"No baseline at {baseline_path}, use --save-baseline")
+        return
+
+    regressions = compare(results, json.loads(baseline_path.read_text()), threshold)
+    if regressions:
+        for regression in regressions:
+            logger.error(regression)
+        raise SystemExit(1)
+
+    logger.success("No regression against the baseline")
+
+
+if __name__ == "__main__":
+    run_benchmarks()
@@ -52,6 +52,9 @@ usage() {
     echo "    --rag                 Run the RAG pipeline only"
     echo "    --all                 Run all the pipelines"
     echo "    -c, --config FILE     Path to pipeline configuration file (required)"
+    echo ""
+    echo "  benchmark               Benchmark the docpage cleaner and parser"
+    echo "    --save-baseline       Save the results as the new baseline"
 }
 
 # Infra command
@@ -268,6 +271,13 @@ manage_pipeline() {
     exit 0
 }
 
+# Run the benchmarks, options are passed through to the benchmark script
+run_benchmark() {
+    BENCHMARK_PATH="$SCRIPT_DIR/benchmarks/run_benchmarks.py"
+    uv run "$BENCHMARK_PATH" "$@"
+    exit 0
+}
+
 # Top-level argument parsing
 if [ $# -eq 0 ]; then
     usage
@@ -295,6 +305,9 @@ case "$COMMAND" in
     pipeline)
         manage_pipeline "$@"
         ;;
+    benchmark)
+        run_benchmark "$@"
+        ;;
     *)
         log_error "Unknown command: $COMMAND"
         echo ""
@@ -3,7 +3,12 @@ from datetime import datetime as dt
 import click
 from loguru import logger
 
-from etl.adapters.zenml.pipelines import docpage_etl
+from etl.adapters.zenml.pipelines import (
+    docpage_etl,
+    docpage_etl_reprocess,
+    docpage_etl_sharded,
+    docpage_etl_streaming,
+)
 
 
 @click.command(
@@ -20,13 +25,38 @@ Example:
     default=False,
     help="Disable cache (default: cache enabled).",
 )
+@click.option(
+    "--streaming",
+    is_flag=True,
+    default=False,
+    help="Fetch, clean and load every docpage on its own as a stream.",
+)
+@click.option(
+    "--sharded",
+    is_flag=True,
+    default=False,
+    help="Split the docpages into shards, each run by its own steps.",
+)
+@click.option(
+    "--reprocess",
+    is_flag=True,
+    default=False,
+    help="Clean and load the archived raw docpages again, without crawling.",
+)
 @click.option(
     "--config",
     type=click.Path(exists=True, dir_okay=False, readable=True),
     required=True,
     help="Path to the configuration file.",
 )
-def run_etl(no_cache: bool, config: str):
+def run_etl(
+    no_cache: bool, streaming: bool, sharded: bool, reprocess: bool, config: str
+):
+    if streaming + sharded + reprocess > 1:
+        raise click.UsageError(
+            "Options --streaming, --sharded and --reprocess are mutually exclusive."
+        )
+
     logger.info("Starting ETL pipeline...")
 
     pipeline_args = {
@@ -35,10 +65,17 @@ def run_etl(no_cache: bool, config: str):
 
     run_args_etl = {}
     pipeline_args["config_path"] = config
+    etl_pipeline = docpage_etl
+    if streaming:
+        etl_pipeline = docpage_etl_streaming
+    elif sharded:
+        etl_pipeline = docpage_etl_sharded
+    elif reprocess:
+        etl_pipeline = docpage_etl_reprocess
     pipeline_args["run_name"] = (
-        f"docpage_etl_run_{dt.now().strftime('%Y_%m_%d:%H_%M_%S')}"
+        f"{etl_pipeline.name}_run_{dt.now().strftime('%Y_%m_%d:%H_%M_%S')}"
     )
-    docpage_etl.with_options(**pipeline_args)(**run_args_etl)
+    etl_pipeline.with_options(**pipeline_args)(**run_args_etl)
 
     logger.info("ETL pipeline finished running.")
 
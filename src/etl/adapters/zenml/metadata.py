@@ -0,0 +1,80 @@
+from collections.abc import Iterable
+import hashlib
+import re
+
+from zenml import get_step_context
+
+# A flag of the 'Flags' section and an example of the 'Examples' section
+FLAG_LINE_RE = re.compile(r"^[\*\-•]?\s*`--")
+EXAMPLE_LINE_RE = re.compile(r"^>")
+
+
+def document_metadata(content: str) -> dict:
+    """
+    Compact description of a docpage: its size, hash and how many flags
+    and examples it documents, instead of the docpage itself.
+    """
+    flags = examples = 0
+    section = None
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            section = stripped.lstrip("#").strip().lower()
+        elif section == "flags" and FLAG_LINE_RE.match(stripped):
+            flags += 1
+        elif section == "examples" and EXAMPLE_LINE_RE.match(stripped):
+            examples += 1
+
+    encoded = content.encode()
+    return {
+        "bytes": len(encoded),
+        "lines": len(content.splitlines()),
+        "sha256": hashlib.sha256(encoded).hexdigest(),
+        "flags": flags,
+        "examples": examples,
+    }
+
+
+def documents_metadata(
+    documents: Iterable[tuple[str, str | None]], seconds: float
+) -> dict:
+    """
+    Compact description of a batch of docpages given with their key
+    (e.g. source or command), along with aggregate statistics.
+    Docpages that are missing are only counted.
+    """
+    described = {}
+    missing = 0
+    for key, content in documents:
+        if content is None:
+            missing += 1
+        else:
+            described[key] = document_metadata(content)
+
+    sizes = [document["bytes"] for document in described.values()]
+    return {
+        "documents": described,
+        "count": len(described),
+        "missing": missing,
+        "bytes": sum(sizes),
+        "max_bytes": max(sizes, default=0),
+        "lines": sum(document["lines"] for document in described.values()),
+        "flags": sum(document["flags"] for document in described.values()),
+        "examples": sum(document["examples"] for document in described.values()),
+        "seconds": round(seconds, 3),
+    }
+
+
+def add_output_metadata(output_name: str, metadata: dict) -> None:
+    """
+    Attach the metadata to the output of the running step, along with
+    the URI of the output artifact where the documents themselves are.
+    """
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name=output_name,
+        metadata={
+            **metadata,
+            "artifact_uri": step_context.get_output_artifact_uri(output_name),
+        },
+    )
@@ -1,12 +1,62 @@
 from zenml import pipeline
 
-from etl.adapters.zenml.steps import clean_docs, fetch_docs, load_docs
+from etl.adapters.zenml.steps import (
+    clean_docs,
+    fetch_docs,
+    load_archived_docs,
+    load_docs,
+    merge_docs,
+    stream_docs,
+)
+from etl.infrastructure.factory import DEFAULT_FETCH_BACKEND
+
+SHARDS = 4
+
+
+@pipeline(settings={"orchestrator": {"synchronous": False}})
+def docpage_etl(
+    doc_configs: list[dict[str, str]], backend: str = DEFAULT_FETCH_BACKEND
+) -> str:
+    sources = [page["source"] for page in doc_configs]
+    raw_docs = fetch_docs(sources, backend=backend)
+    cleaned_docs = clean_docs(raw_docs)
+    docpages = load_docs(doc_configs, cleaned_docs)
+    return docpages
+
+
+@pipeline(settings={"orchestrator": {"synchronous": False}})
+def docpage_etl_streaming(
+    doc_configs: list[dict[str, str]], backend: str = DEFAULT_FETCH_BACKEND
+) -> dict:
+    return stream_docs(doc_configs, backend=backend)
+
+
+@pipeline(settings={"orchestrator": {"synchronous": False}})
+def docpage_etl_sharded(
+    doc_configs: list[dict[str, str]],
+    backend: str = DEFAULT_FETCH_BACKEND,
+    shards: int = SHARDS,
+) -> dict:
+    # Every shard is fetched, cleaned and loaded by its own steps,
+    # so orchestrators that run steps in parallel spread the shards
+    shards = max(1, min(shards, len(doc_configs)))
+    loaded = []
+    for i in range(shards):
+        shard = doc_configs[i::shards]
+        sources = [page["source"] for page in shard]
+        raw_docs = fetch_docs(sources, backend=backend, id=f"fetch_docs_{i}")
+        cleaned_docs = clean_docs(raw_docs, id=f"clean_docs_{i}")
+        load_docs(shard, cleaned_docs, prune=False, id=f"load_docs_{i}")
+        loaded.append(f"load_docs_{i}")
+
+    return merge_docs(doc_configs, shards, after=loaded)
 
 
 @pipeline(settings={"orchestrator": {"synchronous": False}})
-def docpage_etl(doc_configs: list[dict[str, str]]) -> str:
+def docpage_etl_reprocess(doc_configs: list[dict[str, str]]) -> str:
+    # The raw docpages come from the archive of the previous crawls
     sources = [page["source"] for page in doc_configs]
-    raw_docs = fetch_docs(sources)
+    raw_docs = load_archived_docs(sources)
     cleaned_docs = clean_docs(raw_docs)
     docpages = load_docs(doc_configs, cleaned_docs)
     return docpages
@@ -1,29 +1,63 @@
-import asyncio
+import time
 from typing import Annotated
 
 from loguru import logger
-from zenml import get_step_context, step
+from zenml import step
 
+from etl.adapters.zenml.metadata import (
+    add_output_metadata,
+    document_metadata,
+    documents_metadata,
+)
 from etl.application.cleaner import DocCleaner
-from etl.application.crawler import DocCrawler
+from etl.application.crawler import (
+    MAX_CONCURRENCY,
+    MAX_PER_HOST,
+    RETRIES,
+    RETRYABLE_ERRORS,
+    TIMEOUT,
+    DocCrawler,
+)
 from etl.application.loader import DocLoader
-from etl.infrastructure.http_repository import HttpRepository
+from etl.application.streamer import (
+    BATCH_SIZE,
+    CLEAN_WORKERS,
+    QUEUE_SIZE,
+    DocStreamer,
+)
+from etl.domain.value_objects import RawDoc
+from etl.infrastructure.archive_repository import ArchiveRepository
+from etl.infrastructure.cached_repository import CachedRepository
+from etl.infrastructure.factory import (
+    DEFAULT_FETCH_BACKEND,
+    LOCAL_BACKENDS,
+    fetch_repository,
+)
 from etl.infrastructure.mongo_repository import MongoRepository
+from shared.infrastructure.parallel import CHUNK_SIZE
+from shared.infrastructure.runtime import run
 
 
 @step(enable_cache=False)
-def fetch_doc(source: str) -> Annotated[str | None, "raw_doc"]:
+def fetch_doc(
+    source: str,
+    backend: str = DEFAULT_FETCH_BACKEND,
+    retries: int = RETRIES,
+    timeout: float | None = TIMEOUT,
+) -> Annotated[str | None, "raw_doc"]:
     try:
-        crawler = DocCrawler(HttpRepository())
-        content = asyncio.run(crawler.crawl_one(source))
-
-        step_context = get_step_context()
-        step_context.add_output_metadata(
-            output_name="raw_doc", metadata=_get_metadata_for_one(source, content)
+        start = time.perf_counter()
+        crawler = DocCrawler(
+            fetch_repository(backend), retries=retries, timeout=timeout
         )
+        content = run(crawler.crawl_one(source))
+
+        metadata = {"source": source, **document_metadata(content)}
+        metadata["seconds"] = round(time.perf_counter() - start, 3)
+        add_output_metadata("raw_doc", metadata)
 
         return content
-    except RuntimeError as err:
+    except RETRYABLE_ERRORS as err:
         logger.opt(exception=err).error(
             f"Failed to crawl the documentation from source: '{source}'"
         )
@@ -33,63 +67,133 @@ def fetch_doc(source: str) -> Annotated[str | None, "raw_doc"]:
 @step(enable_cache=False)
 def fetch_docs(
     sources: list[str],
-) -> Annotated[list[str] | None, "raw_docs"]:
+    backend: str = DEFAULT_FETCH_BACKEND,
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_per_host: int = MAX_PER_HOST,
+    retries: int = RETRIES,
+    timeout: float | None = TIMEOUT,
+    use_cache: bool = True,
+    archive: bool = True,
+) -> Annotated[list[str | None] | None, "raw_docs"]:
+    use_cache = use_cache and backend not in LOCAL_BACKENDS
     try:
-        crawler = DocCrawler(HttpRepository())
-        contents = asyncio.run(crawler.crawl_many(sources))
-
-        step_context = get_step_context()
-        step_context.add_output_metadata(
-            output_name="raw_docs",
-            metadata=_get_metadata_for_many(zip(sources, contents, strict=True)),
-        )
+        start = time.perf_counter()
+        repository = fetch_repository(backend)
+        if use_cache:
+            repository = CachedRepository(repository, backend)
 
-        return contents
-    except RuntimeError as err:
-        logger.opt(exception=err).error(
-            "Failed to crawl one of many documentation pages"
+        crawler = DocCrawler(
+            repository, max_concurrency, max_per_host, retries, timeout
         )
+        result = run(crawler.crawl_many(sources))
+    except RETRYABLE_ERRORS as err:
+        # The crawl could not even start, e.g. the browser failed to launch
+        logger.opt(exception=err).error("Failed to crawl the documentation pages")
         return None
 
+    # Pages that failed are left as `None`, their docpages keep their stored version
+    for source, error in result.failures.items():
+        logger.error(f"Failed to crawl the documentation from '{source}': {error}")
+    contents = result.contents_of(sources)
+
+    # Keep the raw docpages so they can be cleaned again without a crawl
+    if archive:
+        raw_docs = [
+            RawDoc(source=source, content=content)
+            for source, content in result.contents.items()
+        ]
+        run(ArchiveRepository().save_many(raw_docs))
+
+    metadata = documents_metadata(
+        zip(sources, contents, strict=True), time.perf_counter() - start
+    )
+    metadata["failures"] = result.failures
+    metadata["retries"] = result.retries
+    if use_cache:
+        metadata["cache"] = repository.stats
+
+    add_output_metadata("raw_docs", metadata)
+
+    return contents
 
-def _get_metadata_for_one(source: str, content: str) -> dict:
-    return {"source": source, "content": content}
 
+@step(enable_cache=False)
+def load_archived_docs(
+    sources: list[str],
+) -> Annotated[list[str | None], "raw_docs"]:
+    start = time.perf_counter()
+    archived = {
+        raw_doc.source: raw_doc for raw_doc in run(ArchiveRepository().get(sources))
+    }
 
-def _get_metadata_for_many(pages: list[tuple[str, str]]) -> dict:
-    return {
-        "pages": [{"source": source, "content": content} for source, content in pages],
+    # Sources that were never archived are left as `None`,
+    # their docpages keep their stored version
+    contents = []
+    for source in sources:
+        if source in archived:
+            contents.append(archived[source].content)
+        else:
+            logger.warning(f"No raw docpage archived for source: '{source}'")
+            contents.append(None)
+
+    metadata = documents_metadata(
+        zip(sources, contents, strict=True), time.perf_counter() - start
+    )
+    metadata["fetched_at"] = {
+        source: raw_doc.fetched_at.isoformat() for source, raw_doc in archived.items()
     }
+    add_output_metadata("raw_docs", metadata)
+
+    return contents
 
 
 @step(enable_cache=False)
 def clean_doc(
     raw_doc: str,
 ) -> Annotated[str, "cleaned_doc"]:
+    start = time.perf_counter()
     cleaned_doc = DocCleaner().clean_one(raw_doc)
 
-    step_context = get_step_context()
-    step_context.add_output_metadata(
-        output_name="cleaned_doc",
-        metadata={
-            "cleaned_doc": clean_doc,
-        },
-    )
+    metadata = document_metadata(cleaned_doc)
+    metadata["seconds"] = round(time.perf_counter() - start, 3)
+    add_output_metadata("cleaned_doc", metadata)
 
     return cleaned_doc
 
 
 @step(enable_cache=False)
 def clean_docs(
-    raw_docs: list[str],
-) -> Annotated[list[str], "cleaned_docs"]:
-    cleaned_docs = DocCleaner().clean_many(raw_docs)
-
-    step_context = get_step_context()
-    step_context.add_output_metadata(
-        output_name="cleaned_docs",
-        metadata={"cleaned_docs": cleaned_docs},
+    raw_docs: list[str | None] | None,
+    workers: int | None = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> Annotated[list[str | None] | None, "cleaned_docs"]:
+    # Nothing was fetched, the docpages keep their stored version
+    if raw_docs is None:
+        logger.warning("No documentation pages to clean")
+        return None
+
+    start = time.perf_counter()
+    present = [i for i, raw_doc in enumerate(raw_docs) if raw_doc is not None]
+    outcomes = DocCleaner().clean_batch(
+        [raw_docs[i] for i in present], workers, chunk_size
+    )
+
+    # Documents that are missing or failed are kept in place as `None` so that
+    # the cleaned documents stay aligned with the configuration of their docpages
+    cleaned_docs = [None] * len(raw_docs)
+    errors = {}
+    for i, outcome in zip(present, outcomes, strict=True):
+        cleaned_docs[i] = outcome.value
+        if not outcome.ok:
+            logger.error(f"Failed to clean document #{i}: {outcome.error}")
+            errors[str(i)] = outcome.error
+
+    metadata = documents_metadata(
+        ((str(i), doc) for i, doc in enumerate(cleaned_docs)),
+        time.perf_counter() - start,
     )
+    metadata["errors"] = errors
+    add_output_metadata("cleaned_docs", metadata)
 
     return cleaned_docs
 
@@ -104,16 +208,17 @@ def load_doc(
         "content": cleaned_doc,
     }
 
+    start = time.perf_counter()
     loader = DocLoader(MongoRepository())
-    asyncio.run(loader.load_one(doc_datum))
-
-    step_context = get_step_context()
-    step_context.add_output_metadata(
-        output_name="docpage",
-        metadata={
-            "docpage": doc_datum,
-        },
-    )
+    run(loader.load_one(doc_datum))
+
+    metadata = {
+        "command": doc_datum["command"],
+        "source": doc_datum["source"],
+        **document_metadata(cleaned_doc),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    add_output_metadata("docpage", metadata)
 
     return doc_datum
 
@@ -121,56 +226,148 @@ def load_doc(
 @step(enable_cache=False)
 def load_docs(
     doc_configs: list[dict[str, str]],
-    cleaned_docs: list[str],
+    cleaned_docs: list[str | None] | None,
+    prune: bool = True,
 ) -> Annotated[list[dict[str, str]], "docpages"]:
+    if cleaned_docs is None:
+        cleaned_docs = [None] * len(doc_configs)
+
     doc_data = [
         {**doc, "content": content}
         for doc, content in zip(doc_configs, cleaned_docs, strict=True)
+        if content is not None
     ]
 
-    loader = DocLoader(MongoRepository())
-    asyncio.run(loader.load_many(doc_data))
+    # Docpages that could not be produced this time keep their stored version
+    failed_commands = [
+        doc["command"]
+        for doc, content in zip(doc_configs, cleaned_docs, strict=True)
+        if content is None
+    ]
 
-    step_context = get_step_context()
-    step_context.add_output_metadata(
-        output_name="docpages",
-        metadata={"docpages": doc_data},
+    # Without pruning, the docpages of other commands are left as they are
+    start = time.perf_counter()
+    loader = DocLoader(MongoRepository())
+    if prune:
+        changes = run(loader.sync_many(doc_data, keep=failed_commands))
+    else:
+        changes = run(loader.upsert_many(doc_data))
+
+    metadata = documents_metadata(
+        ((doc["command"], doc["content"]) for doc in doc_data),
+        time.perf_counter() - start,
     )
+    metadata["changes"] = changes.model_dump()
+    add_output_metadata("docpages", metadata)
 
     return doc_data
 
 
+@step(enable_cache=False)
+def merge_docs(
+    doc_configs: list[dict[str, str]],
+    shards: int,
+) -> Annotated[dict, "etl_summary"]:
+    commands = [doc["command"] for doc in doc_configs]
+
+    # The shards were loaded without pruning, the stale docpages go now
+    loader = DocLoader(MongoRepository())
+    deleted = run(loader.prune(commands))
+    stored = {docpage.command for docpage in run(loader.retrieve_many(commands))}
+
+    summary = {
+        "shards": shards,
+        "total": len(commands),
+        "stored": len(stored),
+        "missing": [command for command in commands if command not in stored],
+        "deleted": deleted,
+    }
+
+    add_output_metadata("etl_summary", summary)
+
+    return summary
+
+
+@step(enable_cache=False)
+def stream_docs(
+    doc_configs: list[dict[str, str]],
+    backend: str = DEFAULT_FETCH_BACKEND,
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_per_host: int = MAX_PER_HOST,
+    clean_workers: int = CLEAN_WORKERS,
+    batch_size: int = BATCH_SIZE,
+    queue_size: int = QUEUE_SIZE,
+    retries: int = RETRIES,
+    timeout: float | None = TIMEOUT,
+    use_cache: bool = True,
+    archive: bool = True,
+) -> Annotated[dict, "etl_summary"]:
+    use_cache = use_cache and backend not in LOCAL_BACKENDS
+    repository = fetch_repository(backend)
+    if use_cache:
+        repository = CachedRepository(repository, backend)
+
+    streamer = DocStreamer(
+        DocCrawler(repository, max_concurrency, max_per_host, retries, timeout),
+        MongoRepository(),
+        clean_workers,
+        batch_size,
+        queue_size,
+        ArchiveRepository() if archive else None,
+    )
+    summary = run(streamer.stream(doc_configs)).model_dump()
+
+    for command, error in summary["failed"].items():
+        logger.error(f"Failed to process the docpage of '{command}': {error}")
+
+    metadata = {key: value for key, value in summary.items() if key != "changes"}
+    metadata["changes"] = {
+        kind: len(commands) for kind, commands in summary["changes"].items()
+    }
+    if use_cache:
+        metadata["cache"] = repository.stats
+
+    add_output_metadata("etl_summary", metadata)
+
+    return summary
+
+
 @step(enable_cache=False)
 def retrieve_doc(command: str) -> Annotated[dict[str, str], "docpage"]:
     loader = DocLoader(MongoRepository())
-    docpage = asyncio.run(loader.retrieve_one(command))
+    docpage = run(loader.retrieve_one(command))
     doc_datum = docpage.dict()
 
-    step_context = get_step_context()
-    step_context.add_output_metadata(
-        output_name="docpage",
-        metadata={
-            "docpage": doc_datum,
-        },
-    )
+    metadata = {
+        "command": command,
+        "source": docpage.source,
+        **document_metadata(docpage.content),
+    }
+    add_output_metadata("docpage", metadata)
 
     return doc_datum
 
 
 @step(enable_cache=False)
 def retrieve_docs(commands: list[str]) -> Annotated[list[dict[str, str]], "doc_pages"]:
+    start = time.perf_counter()
     loader = DocLoader(MongoRepository())
-    docpages = asyncio.run(loader.retrieve_many(commands))
+    docpages = run(loader.retrieve_many(commands))
     allowed_keys = {"command", "source", "content"}
     doc_data = [
         {k: v for k, v in docpage.dict().items() if k in allowed_keys}
         for docpage in docpages
     ]
 
-    step_context = get_step_context()
-    step_context.add_output_metadata(
-        output_name="doc_pages",
-        metadata={"doc_pages": doc_data},
+    metadata = documents_metadata(
+        ((doc["command"], doc["content"]) for doc in doc_data),
+        time.perf_counter() - start,
     )
+    # `missing` is a count, as in the metadata of the other docpage steps
+    retrieved = {doc["command"] for doc in doc_data}
+    missing = [command for command in commands if command not in retrieved]
+    metadata["missing"] = len(missing)
+    metadata["missing_commands"] = missing
+    add_output_metadata("doc_pages", metadata)
 
     return doc_data
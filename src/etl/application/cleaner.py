@@ -1,4 +1,9 @@
 from etl.domain.services import MarkdownCleanerService
+from shared.infrastructure.parallel import CHUNK_SIZE, Outcome, parallel_map
+
+
+def _clean(raw_doc: str) -> str:
+    return MarkdownCleanerService(raw_doc).clean()
 
 
 class DocCleaner:
@@ -21,3 +26,15 @@ class DocCleaner:
             cleaned_docs.append(MarkdownCleanerService(raw_doc).clean())
 
         return cleaned_docs
+
+    def clean_batch(
+        self,
+        raw_docs: list[str],
+        workers: int | None = 1,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> list[Outcome[str]]:
+        """
+        Clean multiple documents, spreading chunks of them over `workers` processes.
+        A document that fails to be cleaned is reported in its outcome.
+        """
+        return parallel_map(_clean, raw_docs, workers, chunk_size)
@@ -1,34 +1,153 @@
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import nullcontext
+import random
+from urllib.parse import urlsplit
+
+from loguru import logger
+
 from etl.domain.repositories import DocRepository
+from etl.domain.value_objects import CrawlResult
+from shared.infrastructure.parallel import Outcome
+
+MAX_CONCURRENCY = 8
+MAX_PER_HOST = 4
+
+# Attempts after the first one, and the seconds a single attempt may take
+RETRIES = 2
+TIMEOUT = 60.0
+
+# Exponential backoff between attempts: 0.5s, 1s, 2s... up to 8s, with jitter
+BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+
+# Errors worth another attempt, e.g. a failed request or a page that timed out.
+# Permanent failures (a missing page, an unknown command) are raised as other
+# errors by the repositories, so they fail the page at once
+RETRYABLE_ERRORS = (RuntimeError, OSError, TimeoutError)
 
 
 class DocCrawler:
     def __init__(
         self,
         repository: DocRepository,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_per_host: int = MAX_PER_HOST,
+        retries: int = RETRIES,
+        timeout: float | None = TIMEOUT,
     ):
         self.repository = repository
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.retries = max(0, retries)
+        self.timeout = timeout
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        """
+        Seconds to wait before retrying after the given failed attempt, counted
+        from 0. The delay is drawn at random between 0 and the exponential backoff
+        (`BACKOFF` for the first retry, doubling up to `MAX_BACKOFF`): with this
+        "full jitter", pages that failed together are not retried together.
+        """
+        return random.uniform(0, min(MAX_BACKOFF, BACKOFF * 2**attempt))
+
+    async def _fetch(
+        self, source: str, host: asyncio.Semaphore | None = None
+    ) -> tuple[str, int]:
+        """
+        Fetch the page of the source, retrying it on failure.
+        Return its content along with the number of retries it took.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                async with host or nullcontext(), asyncio.timeout(self.timeout):
+                    return await self.repository.get(source), attempt
+            except RETRYABLE_ERRORS as err:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(
+                    f"Failed to fetch '{source}' ({type(err).__name__}: {err}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                # The host is free for other pages during the backoff
+                await asyncio.sleep(delay)
 
     async def crawl_one(self, source: str) -> str:
         """
         Given the source of the documentation,
         fetch its markdown content using the repository.
         """
-        return await self.repository.get(source)
+        content, _ = await self._fetch(source)
+        return content
 
     async def crawl_many(
         self,
         sources: list[str],
-    ) -> list[str]:
+    ) -> CrawlResult:
         """
         Fetch the markdown content from multiple documentation sources.
+
+        At most `max_concurrency` pages are in flight at any time, and at most
+        `max_per_host` of them target the same host. The repository session
+        (e.g. the headless browser) is shared by the whole batch.
+        Every page is fetched on its own: a page that still fails after its
+        retries is reported in the result and does not fail the others.
         """
-        docs = []
+        result = CrawlResult()
+        async for index, outcome in self.crawl_stream(sources):
+            if outcome.ok:
+                result.contents[sources[index]], retries = outcome.value
+                result.retries += retries
+            else:
+                result.failures[sources[index]] = outcome.error
+
+        return result
+
+    async def crawl_stream(
+        self,
+        sources: Iterable[str],
+    ) -> AsyncIterator[tuple[int, Outcome[tuple[str, int]]]]:
+        """
+        Fetch the markdown content from multiple documentation sources,
+        yielding the index of each source with its outcome as soon as
+        the page is fetched, so in completion order. The value of a
+        successful outcome is the content and the number of retries.
+
+        Only `max_concurrency` pages are in flight: the next sources are not
+        fetched until the consumer has taken the pages already fetched.
+        A page that still fails after its retries is reported in its outcome.
+        """
+        per_host = defaultdict(lambda: asyncio.Semaphore(max(1, self.max_per_host)))
+
+        async def crawl(
+            index: int, source: str
+        ) -> tuple[int, Outcome[tuple[str, int]]]:
+            try:
+                host = per_host[urlsplit(source).netloc]
+                return index, Outcome(await self._fetch(source, host))
+            except Exception as err:
+                return index, Outcome(error=f"{type(err).__name__}: {err}")
 
-        for source in sources:
+        pending = set()
+        sources = enumerate(sources)
+        async with self.repository:
             try:
-                doc = await self.repository.get(source)
-                docs.append(doc)
-            except Exception:
-                raise
+                while True:
+                    for index, source in sources:
+                        pending.add(asyncio.ensure_future(crawl(index, source)))
+                        if len(pending) >= max(1, self.max_concurrency):
+                            break
+                    if not pending:
+                        return
 
-        return docs
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+            finally:
+                for task in pending:
+                    task.cancel()
@@ -1,5 +1,5 @@
 from etl.domain.repositories import DocRepository
-from etl.domain.value_objects import Docpage
+from etl.domain.value_objects import Docpage, DocpageChanges
 from etl.infrastructure.utils import init_db
 
 
@@ -35,6 +35,44 @@ class DocLoader:
 
         return await self.repository.save_many(docpages)
 
+    async def sync_many(
+        self,
+        doc_data: list[dict[str, str]],
+        keep: list[str] | None = None,
+    ) -> DocpageChanges:
+        """
+        Make the given repository hold exactly the given documents,
+        only writing the ones that changed.
+        The documents of the commands to keep are left as they are.
+        """
+        await init_db()
+        docpages = [Docpage.model_validate(doc_datum) for doc_datum in doc_data]
+        return await self.repository.sync_many(docpages, keep)
+
+    async def upsert_many(
+        self,
+        doc_data: list[dict[str, str]],
+    ) -> DocpageChanges:
+        """
+        Write the given documents that are new or changed, leaving
+        every other document of the repository as it is.
+        """
+        await init_db()
+        docpages = [Docpage.model_validate(doc_datum) for doc_datum in doc_data]
+        return await self.repository.upsert_many(
+            docpages, await self.repository.digests()
+        )
+
+    async def prune(self, commands: list[str]) -> list[str]:
+        """
+        Delete the documents of every command but the given ones,
+        and return the deleted commands.
+        """
+        await init_db()
+        return await self.repository.prune(
+            await self.repository.digests(), set(commands)
+        )
+
     async def retrieve_one(
         self,
         command: str,
@@ -0,0 +1,166 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+import time
+
+from etl.application.cleaner import DocCleaner
+from etl.application.crawler import DocCrawler
+from etl.domain.repositories import DocRepository
+from etl.domain.value_objects import Docpage, EtlSummary, RawDoc
+from etl.infrastructure.mongo_repository import MongoRepository
+from etl.infrastructure.utils import init_db
+
+CLEAN_WORKERS = 1
+BATCH_SIZE = 32
+QUEUE_SIZE = 64
+
+# Seconds a partial batch waits for more docpages before it is written anyway
+FLUSH_INTERVAL = 1.0
+
+
+class DocStreamer:
+    """
+    Runs the ETL as a stream: every docpage goes through fetch, clean and
+    load on its own, instead of each stage waiting for the whole catalog.
+
+    The stages are connected by bounded queues, so a slow stage holds back
+    the ones before it and at most a few batches of docpages are in memory.
+    The raw docpages are archived as they are fetched, if an archive is given.
+    """
+
+    def __init__(
+        self,
+        crawler: DocCrawler,
+        repository: MongoRepository,
+        clean_workers: int = CLEAN_WORKERS,
+        batch_size: int = BATCH_SIZE,
+        queue_size: int = QUEUE_SIZE,
+        archive: DocRepository[RawDoc] | None = None,
+    ):
+        self.crawler = crawler
+        self.repository = repository
+        self.archive = archive
+        self.clean_workers = max(1, clean_workers)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+
+    async def stream(self, doc_configs: list[dict[str, str]]) -> EtlSummary:
+        """
+        Fetch, clean and load the given docpages, then delete the stored
+        docpages that are no longer configured. Docpages that fail keep
+        their stored version and are reported in the summary.
+        """
+        start = time.perf_counter()
+        summary = EtlSummary(total=len(doc_configs))
+
+        await init_db()
+        existing = await self.repository.digests()
+
+        fetched = asyncio.Queue(self.queue_size)
+        cleaned = asyncio.Queue(self.queue_size)
+
+        # Cleaning is CPU bound, it only runs in parallel in other processes
+        executor = (
+            ProcessPoolExecutor(self.clean_workers) if self.clean_workers > 1 else None
+        )
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._fetch(doc_configs, fetched, summary))
+                group.create_task(self._clean(fetched, cleaned, executor, summary))
+                group.create_task(self._load(cleaned, existing, summary, start))
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        keep = {doc["command"] for doc in doc_configs}
+        summary.changes.deleted = await self.repository.prune(existing, keep)
+        summary.elapsed_seconds = time.perf_counter() - start
+
+        return summary
+
+    async def _fetch(
+        self,
+        doc_configs: list[dict[str, str]],
+        fetched: asyncio.Queue,
+        summary: EtlSummary,
+    ) -> None:
+        sources = (doc["source"] for doc in doc_configs)
+        async for index, outcome in self.crawler.crawl_stream(sources):
+            doc_config = doc_configs[index]
+            if outcome.ok:
+                raw_doc, retries = outcome.value
+                summary.retries += retries
+                if self.archive:
+                    await self.archive.save_one(
+                        RawDoc(source=doc_config["source"], content=raw_doc)
+                    )
+                await fetched.put((doc_config, raw_doc))
+            else:
+                summary.failed[doc_config["command"]] = outcome.error
+
+        for _ in range(self.clean_workers):
+            await fetched.put(None)
+
+    async def _clean(
+        self,
+        fetched: asyncio.Queue,
+        cleaned: asyncio.Queue,
+        executor: Executor | None,
+        summary: EtlSummary,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        clean_one = DocCleaner().clean_one
+
+        async def worker():
+            while (item := await fetched.get()) is not None:
+                doc_config, raw_doc = item
+                try:
+                    content = await loop.run_in_executor(executor, clean_one, raw_doc)
+                except Exception as err:
+                    summary.failed[doc_config["command"]] = (
+                        f"{type(err).__name__}: {err}"
+                    )
+                    continue
+                await cleaned.put(
+                    Docpage.model_validate({**doc_config, "content": content})
+                )
+
+        async with asyncio.TaskGroup() as group:
+            for _ in range(self.clean_workers):
+                group.create_task(worker())
+
+        await cleaned.put(None)
+
+    async def _load(
+        self,
+        cleaned: asyncio.Queue,
+        existing: dict[str, str],
+        summary: EtlSummary,
+        start: float,
+    ) -> None:
+        async def write(batch: list[Docpage]) -> None:
+            summary.changes.extend(await self.repository.upsert_many(batch, existing))
+            summary.loaded += len(batch)
+            summary.batches += 1
+            if summary.first_write_seconds is None:
+                summary.first_write_seconds = time.perf_counter() - start
+
+        batch = []
+        while True:
+            try:
+                page = await asyncio.wait_for(cleaned.get(), FLUSH_INTERVAL)
+            except TimeoutError:
+                # Do not hold back a partial batch while the stream is slow
+                if batch:
+                    await write(batch)
+                    batch = []
+                continue
+
+            if page is None:
+                break
+            batch.append(page)
+            if len(batch) >= self.batch_size:
+                await write(batch)
+                batch = []
+
+        if batch:
+            await write(batch)
@@ -5,6 +5,16 @@ T = TypeVar("T")
 
 
 class DocRepository[T](ABC):
+    async def __aenter__(self):
+        """
+        Open whatever session the repository needs so that it can be shared
+        across many calls. Repositories without such a session do nothing.
+        """
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return False
+
     @abstractmethod
     async def save_one(self, page: T) -> T: ...
 
@@ -1,7 +1,16 @@
+from datetime import UTC, datetime
+import hashlib
+
 from beanie import Document
+from pydantic import BaseModel, Field, model_validator
 import pymongo
 
 
+def docpage_hash(source: str, content: str) -> str:
+    """Hash of everything that is persisted for a docpage besides its command."""
+    return hashlib.sha256(f"{source}\0{content}".encode()).hexdigest()
+
+
 class Docpage(Document):
     # The command whose documentation page we are working with: e.g. "glob"
     command: str
@@ -12,6 +21,20 @@ class Docpage(Document):
     # The entire content of the docpage properly cleaned
     content: str
 
+    # Hash of the source and content, so unchanged docpages need not be rewritten
+    content_hash: str = ""
+
+    @model_validator(mode="before")
+    @classmethod
+    def _hash_content(cls, data):
+        if isinstance(data, dict) and not data.get("content_hash"):
+            if "source" in data and "content" in data:
+                data = {
+                    **data,
+                    "content_hash": docpage_hash(data["source"], data["content"]),
+                }
+        return data
+
     class Settings:
         name = "docpages"
         indexes = [
@@ -28,3 +51,73 @@ class Docpage(Document):
         # We don't have concurrent updates on this document
         # so we can disable state management
         use_state_management = False
+
+
+class RawDoc(BaseModel):
+    """A docpage as it was fetched, before it was cleaned."""
+
+    source: str
+    content: str
+    fetched_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.content.encode()).hexdigest()
+
+
+class CrawlResult(BaseModel):
+    """Pages fetched by a crawl, and the error of the pages that failed, by source."""
+
+    contents: dict[str, str] = Field(default_factory=dict)
+    failures: dict[str, str] = Field(default_factory=dict)
+
+    # Number of retries it took over all pages
+    retries: int = 0
+
+    def contents_of(self, sources: list[str]) -> list[str | None]:
+        """Return the contents in the order of the sources, `None` if it failed."""
+        return [self.contents.get(source) for source in sources]
+
+
+class DocpageDigest(BaseModel):
+    """Projection of a docpage that is enough to tell whether it changed."""
+
+    command: str
+    content_hash: str = ""
+
+
+class DocpageChanges(BaseModel):
+    """Commands whose docpages were touched by a synchronization."""
+
+    inserted: list[str] = Field(default_factory=list)
+    updated: list[str] = Field(default_factory=list)
+    unchanged: list[str] = Field(default_factory=list)
+    deleted: list[str] = Field(default_factory=list)
+
+    def extend(self, other: "DocpageChanges") -> None:
+        """Add the commands touched by another synchronization."""
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.deleted += other.deleted
+
+
+class EtlSummary(BaseModel):
+    """Outcome of a streaming ETL run."""
+
+    # Number of docpages in the configuration, and how many of them were loaded
+    total: int = 0
+    loaded: int = 0
+
+    # Error message of the docpages that failed, keyed by command
+    failed: dict[str, str] = Field(default_factory=dict)
+
+    changes: DocpageChanges = Field(default_factory=DocpageChanges)
+
+    # Number of fetch retries over all pages
+    retries: int = 0
+
+    # Number of bulk writes, and seconds from the start to the first of them
+    batches: int = 0
+    first_write_seconds: float | None = None
+    elapsed_seconds: float = 0.0
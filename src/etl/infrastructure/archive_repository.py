@@ -0,0 +1,107 @@
+import asyncio
+from datetime import UTC, datetime
+from functools import singledispatchmethod
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+from config import settings
+from etl.domain.repositories import DocRepository
+from etl.domain.value_objects import RawDoc
+from etl.infrastructure.exceptions import RawDocNotFoundError
+
+# Fetch times sort chronologically in this format
+TIME_FORMAT = "%Y%m%dT%H%M%S%fZ"
+
+COMPRESS_LEVEL = 6
+
+
+class ArchiveRepository(DocRepository[RawDoc]):
+    """
+    Gzip compressed archive of the raw docpages, keyed by source and fetch time,
+    so the cleaner can be run again on them without crawling the website.
+
+    Every source has its own directory holding its source URL and one file
+    per fetch, named after the fetch time and the hash of the content.
+    A fetch whose content did not change since the last one is not archived.
+    """
+
+    SOURCE_FILE = "source"
+
+    def __init__(self, directory: str | os.PathLike = settings.ETL_ARCHIVE_DIR):
+        self._directory = Path(directory).expanduser()
+
+    def _source_dir(self, source: str) -> Path:
+        return self._directory / hashlib.sha256(source.encode()).hexdigest()
+
+    def _fetches(self, source: str) -> list[Path]:
+        """Archived files of a source, from the oldest to the latest."""
+        return sorted(self._source_dir(source).glob("*.md.gz"))
+
+    def _save(self, page: RawDoc) -> RawDoc:
+        fetches = self._fetches(page.source)
+        content_hash = page.content_hash
+        if fetches and fetches[-1].name.endswith(f"-{content_hash[:16]}.md.gz"):
+            return page
+
+        source_dir = self._source_dir(page.source)
+        source_dir.mkdir(parents=True, exist_ok=True)
+        (source_dir / self.SOURCE_FILE).write_text(page.source, encoding="utf-8")
+
+        fetched_at = page.fetched_at.astimezone(UTC).strftime(TIME_FORMAT)
+        path = source_dir / f"{fetched_at}-{content_hash[:16]}.md.gz"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(
+            gzip.compress(page.content.encode(), compresslevel=COMPRESS_LEVEL)
+        )
+        tmp_path.replace(path)
+        return page
+
+    def _load(self, source: str) -> RawDoc:
+        fetches = self._fetches(source)
+        if not fetches:
+            raise RawDocNotFoundError(f"No raw docpage archived for source: {source}")
+
+        latest = fetches[-1]
+        fetched_at = datetime.strptime(latest.name.split("-", 1)[0], TIME_FORMAT)
+        return RawDoc(
+            source=source,
+            content=gzip.decompress(latest.read_bytes()).decode(),
+            fetched_at=fetched_at.replace(tzinfo=UTC),
+        )
+
+    async def save_one(self, page: RawDoc) -> RawDoc:
+        return await asyncio.to_thread(self._save, page)
+
+    async def save_many(self, pages: list[RawDoc]) -> list[RawDoc]:
+        return await asyncio.to_thread(lambda: [self._save(page) for page in pages])
+
+    @singledispatchmethod
+    async def get(self, query):
+        raise TypeError(f"Unsupported type for query: {type(query)}")
+
+    @get.register
+    async def _(self, query: str) -> RawDoc:
+        """
+        Return the latest archived fetch of the given source.
+        """
+        return await asyncio.to_thread(self._load, query)
+
+    @get.register
+    async def _(self, query: list) -> list[RawDoc]:
+        """
+        Return the latest archived fetch of the given sources,
+        leaving out the sources that were never archived.
+        """
+
+        def load_all() -> list[RawDoc]:
+            pages = []
+            for source in query:
+                try:
+                    pages.append(self._load(source))
+                except RawDocNotFoundError:
+                    continue
+            return pages
+
+        return await asyncio.to_thread(load_all)
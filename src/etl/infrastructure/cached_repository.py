@@ -0,0 +1,131 @@
+from functools import singledispatchmethod
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import settings
+from etl.domain.repositories import DocRepository
+from etl.infrastructure.exceptions import PermanentFetchError, is_permanent_status
+from etl.infrastructure.fetch_cache import CacheEntry, FetchCache, content_hash
+from etl.infrastructure.static_http_repository import shared_http_client
+
+
+class CachedRepository(DocRepository[str]):
+    """
+    Puts a persistent fetch cache in front of another docpage repository.
+
+    Before a page is handed to the wrapped repository, a conditional request
+    is sent with the cached validators (ETag, Last-Modified). If the server
+    answers that the page was not modified, or if the body hashes to the same
+    value as before, the cached markdown is returned and the page is neither
+    downloaded by the wrapped repository nor rendered again.
+    A changed page is converted from the body of that same response when the
+    wrapped repository can convert HTML (`convert`), so it is downloaded once.
+    Each backend renders pages differently, so each has its own cache.
+    """
+
+    def __init__(
+        self,
+        repository: DocRepository[str],
+        backend: str,
+        cache: FetchCache | None = None,
+    ):
+        self._repository = repository
+        self._cache = cache or FetchCache(
+            Path(settings.ETL_CACHE_DIR).expanduser() / backend
+        )
+        self._sessions = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def __aenter__(self):
+        if self._sessions == 0:
+            self._cache.load()
+            await self._repository.__aenter__()
+        self._sessions += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._sessions -= 1
+        if self._sessions == 0:
+            try:
+                await self._repository.__aexit__(exc_type, exc_value, traceback)
+            finally:
+                self._cache.flush()
+        return False
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    async def save_one(self, page: str) -> str:
+        return await self._repository.save_one(page)
+
+    async def save_many(self, pages: list[str]) -> list[str]:
+        return await self._repository.save_many(pages)
+
+    @singledispatchmethod
+    async def get(self, query) -> str:
+        raise TypeError(f"Unsupported type for query: {type(query)}")
+
+    @get.register
+    async def _(self, query: str) -> str:
+        """
+        Given the source URL, return the cached markdown if the page did not
+        change upstream, otherwise fetch it with the wrapped repository.
+        """
+        if self._sessions == 0:
+            async with self:
+                return await self.get(query)
+
+        # Only HTTP sources can be validated
+        if urlsplit(query).scheme not in ("http", "https"):
+            return await self._repository.get(query)
+
+        cached = self._cache.get(query)
+        headers = {}
+        if cached:
+            entry, _ = cached
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            client = await shared_http_client()
+            response = await client.get(query, headers=headers)
+            if cached and response.status_code == httpx.codes.NOT_MODIFIED:
+                self.hits += 1
+                return cached[1]
+            response.raise_for_status()
+        except httpx.HTTPStatusError as err:
+            if is_permanent_status(err.response.status_code):
+                raise PermanentFetchError(f"Fetch failed: {err}") from err
+            self.misses += 1
+            return await self._repository.get(query)
+        except httpx.HTTPError:
+            # Let the wrapped repository decide how to deal with the source
+            self.misses += 1
+            return await self._repository.get(query)
+
+        entry = CacheEntry(
+            source=query,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=content_hash(response.content),
+        )
+
+        if cached and cached[0].content_hash == entry.content_hash:
+            self.hits += 1
+            self._cache.put(entry)
+            return cached[1]
+
+        self.misses += 1
+        convert = getattr(self._repository, "convert", None)
+        if convert is None:
+            markdown = await self._repository.get(query)
+        else:
+            markdown = await convert(response.text)
+        self._cache.put(entry, markdown)
+        return markdown
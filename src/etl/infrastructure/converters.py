@@ -0,0 +1,95 @@
+import re
+
+import pypandoc
+
+# Only the page body is converted: navigation, sidebars and footers are left out
+MAIN_RE = re.compile(r"<main\b[^>]*>(.*)</main>", re.DOTALL | re.IGNORECASE)
+
+# Page chrome that pandoc would otherwise render as stray paragraphs,
+# e.g. the language label placed right before each code block
+CHROME_RE = re.compile(
+    r"<(button|script|style|svg)\b[^>]*>.*?</\1>"
+    r"|<span\b[^>]*class=\"lang\"[^>]*>.*?</span>",
+    re.DOTALL | re.IGNORECASE,
+)
+
+# Code blocks are given one language so that pandoc always fences them
+PRE_RE = re.compile(r"<pre\b[^>]*>\s*(?:<code\b[^>]*>)?", re.IGNORECASE)
+
+# Heading anchors ("[#](#glob-for-filesystem)") are dropped altogether,
+# other links and images are replaced by their text
+ANCHOR_RE = re.compile(r"\[[^\]]*\]\(#[^)]*\)[ \t]*")
+LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+
+# Backslash escapes outside of inline code, e.g. "\*.rs" -> "*.rs"
+ESCAPE_RE = re.compile(r"(`[^`]*`)|\\([!-/:-@\[-`{-~])")
+
+# Opening or closing code fence, but not a code span such as "```> ls {flags}```"
+FENCE_RE = re.compile(r"^\s*(```|~~~)(?!.*\1\s*$)")
+
+# The YAML frontmatter of the documentation sources
+FRONTMATTER_RE = re.compile(r"\A---\r?\n.*?^---[ \t]*$\n?", re.DOTALL | re.MULTILINE)
+
+# HTML comments and tags of the documentation sources, e.g.
+# "<div class='command-title'>...</div>" around the description
+HTML_COMMENT_RE = re.compile(r"<!--.*?-->\n?", re.DOTALL)
+HTML_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+
+
+def strip_links(markdown: str) -> str:
+    """
+    Replace markdown links by their text, the way the crawler does
+    when it is configured to ignore links.
+    """
+    return LINK_RE.sub(r"\1", ANCHOR_RE.sub("", markdown))
+
+
+def _unescape(line: str) -> str:
+    return ESCAPE_RE.sub(lambda m: m.group(1) or m.group(2), line)
+
+
+def static_html_to_markdown(html: str) -> str:
+    """
+    Convert a static HTML docpage to markdown without a browser.
+    The output follows the layout of the crawled markdown so that
+    the cleaner accepts it unchanged.
+    """
+    main = MAIN_RE.search(html)
+    body = CHROME_RE.sub("", main.group(1) if main else html)
+    body = PRE_RE.sub('<pre class="nu"><code>', body)
+
+    markdown = pypandoc.convert_text(
+        body, "gfm-raw_html", format="html", extra_args=["--wrap=none"]
+    )
+
+    lines = []
+    inside_code = False
+    for line in markdown.splitlines():
+        if FENCE_RE.match(line):
+            inside_code = not inside_code
+            lines.append(line)
+        else:
+            lines.append(line if inside_code else _unescape(strip_links(line)).rstrip())
+
+    return "\n".join(lines)
+
+
+def source_markdown_to_markdown(markdown: str) -> str:
+    """
+    Convert a docpage from the documentation sources (`commands/docs/*.md`)
+    to the layout of the crawled markdown so that the cleaner accepts it.
+    """
+    markdown = HTML_COMMENT_RE.sub("", FRONTMATTER_RE.sub("", markdown, count=1))
+
+    lines = []
+    inside_code = False
+    for line in markdown.splitlines():
+        if FENCE_RE.match(line):
+            inside_code = not inside_code
+            lines.append(line)
+        else:
+            lines.append(
+                line if inside_code else strip_links(HTML_TAG_RE.sub("", line)).rstrip()
+            )
+
+    return "\n".join(lines)
@@ -1,2 +1,19 @@
 class DocpageNotFoundError(Exception):
     """Exception raised when the documentation page for a command is not found."""
+
+
+class RawDocNotFoundError(Exception):
+    """Exception raised when no raw docpage was archived for a source."""
+
+
+class PermanentFetchError(Exception):
+    """Exception raised when a docpage cannot be fetched and another attempt would not help."""
+
+
+# Client errors that may go away on another attempt: timeouts and rate limits
+TRANSIENT_CLIENT_ERRORS = frozenset({408, 425, 429})
+
+
+def is_permanent_status(status_code: int) -> bool:
+    """Return whether an HTTP status means the page will not be fetched by retrying."""
+    return 400 <= status_code < 500 and status_code not in TRANSIENT_CLIENT_ERRORS
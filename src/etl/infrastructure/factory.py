@@ -0,0 +1,34 @@
+from etl.domain.repositories import DocRepository
+from etl.infrastructure.file_repository import FileRepository
+from etl.infrastructure.http_repository import HttpRepository
+from etl.infrastructure.nu_repository import NuRepository
+from etl.infrastructure.static_http_repository import StaticHttpRepository
+
+# Fetch backends that can be selected from the pipeline configuration
+FETCH_BACKENDS = {
+    # Renders every page in a headless browser
+    "crawl4ai": HttpRepository,
+    # Plain HTTP requests, for static documentation sites
+    "static": StaticHttpRepository,
+    # Introspection of the locally installed Nushell
+    "nu": NuRepository,
+    # Local checkout of the documentation sources
+    "file": FileRepository,
+}
+
+# Backends that never hit the network, there is nothing to revalidate for them
+LOCAL_BACKENDS = {"nu", "file"}
+
+DEFAULT_FETCH_BACKEND = "crawl4ai"
+
+
+def fetch_repository(backend: str = DEFAULT_FETCH_BACKEND) -> DocRepository[str]:
+    """
+    Build the repository used to fetch raw docpages for the given backend name.
+    """
+    try:
+        return FETCH_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown fetch backend '{backend}', expected one of: {', '.join(FETCH_BACKENDS)}"
+        ) from None
@@ -0,0 +1,134 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+import fcntl
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from config import settings
+
+
+class CacheEntry(BaseModel):
+    # The docpage source this entry was fetched from
+    source: str
+
+    # HTTP validators returned by the server, if any
+    etag: str | None = None
+    last_modified: str | None = None
+
+    # Hash of the raw response body, used when the server sends no validators
+    content_hash: str
+
+    fetched_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+def content_hash(content: bytes | str) -> str:
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
+
+
+class FetchCache:
+    """
+    Persistent cache of fetched docpages.
+    Each source keeps its validators in a JSON index, next to the markdown
+    it was rendered to, so unchanged pages need not be rendered again.
+
+    Several runs may use the cache at once, e.g. the shards of the ETL: each
+    writes back only the sources it fetched, merged into the index on disk
+    under a lock, and the markdown of an entry is named after the body it was
+    rendered from, so an entry never points at the markdown of another.
+    """
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "index.lock"
+
+    def __init__(self, directory: str | os.PathLike = settings.ETL_CACHE_DIR):
+        self._directory = Path(directory).expanduser()
+        self._entries: dict[str, CacheEntry] = {}
+        # Sources put since the index was loaded, the others are left as on disk
+        self._changed: set[str] = set()
+
+    def _markdown_path(self, entry: CacheEntry) -> Path:
+        return self._directory / (
+            f"{content_hash(entry.source)}-{entry.content_hash[:16]}.md"
+        )
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock of the index, shared by the runs using the cache."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        with (self._directory / self.LOCK_FILE).open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict[str, CacheEntry]:
+        index_path = self._directory / self.INDEX_FILE
+        if not index_path.exists():
+            return {}
+
+        with index_path.open("r", encoding="utf-8") as f:
+            entries = (CacheEntry.model_validate(entry) for entry in json.load(f))
+            return {entry.source: entry for entry in entries}
+
+    def load(self) -> None:
+        """Read the index from disk, starting empty if there is none."""
+        self._entries = self._read_index()
+        self._changed = set()
+
+    def flush(self) -> None:
+        """
+        Write the sources put since the index was loaded to disk, merged with
+        the index as other runs may have written it in the meantime.
+        """
+        if not self._changed:
+            return
+
+        with self._locked():
+            entries = self._read_index()
+            entries.update((source, self._entries[source]) for source in self._changed)
+
+            index_path = self._directory / self.INDEX_FILE
+            tmp_path = index_path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(
+                    [entry.model_dump(mode="json") for entry in entries.values()], f
+                )
+            tmp_path.replace(index_path)
+
+        self._entries = entries
+        self._changed = set()
+
+    def get(self, source: str) -> tuple[CacheEntry, str] | None:
+        """Return the cached entry of the source and its markdown, if any."""
+        entry = self._entries.get(source)
+        if entry is None:
+            return None
+
+        markdown_path = self._markdown_path(entry)
+        if not markdown_path.exists():
+            return None
+
+        return entry, markdown_path.read_text(encoding="utf-8")
+
+    def put(self, entry: CacheEntry, markdown: str | None = None) -> None:
+        """
+        Record the entry of a source. The markdown is only written when given,
+        so refreshing the validators of an unchanged page is cheap.
+        """
+        if markdown is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            markdown_path = self._markdown_path(entry)
+            tmp_path = markdown_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(markdown, encoding="utf-8")
+            tmp_path.replace(markdown_path)
+
+        self._entries[entry.source] = entry
+        self._changed.add(entry.source)
@@ -0,0 +1,94 @@
+import asyncio
+from functools import singledispatchmethod
+import mmap
+from pathlib import Path, PurePosixPath
+from urllib.parse import unquote, urlsplit
+
+from config import settings
+from etl.domain.repositories import DocRepository
+from etl.infrastructure.converters import source_markdown_to_markdown
+from etl.infrastructure.exceptions import PermanentFetchError
+
+
+def read_file(path: Path) -> str:
+    """
+    Read a whole file through a memory map, so its content is copied
+    once from the page cache instead of going through buffered reads.
+    """
+    with open(path, "rb") as file:
+        if path.stat().st_size == 0:
+            return ""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[:].decode("utf-8")
+
+
+class FileRepository(DocRepository[str]):
+    """
+    Reads docpages from a local checkout of the Nushell documentation sources,
+    so the ETL pipeline can run offline at disk speed.
+
+    Sources are either `file://` paths to the markdown files or, when a
+    checkout directory is configured, the URLs of the pages on the website,
+    e.g. `https://www.nushell.sh/commands/docs/str_join.html` is read from
+    `<checkout>/commands/docs/str_join.md`.
+    """
+
+    def __init__(self, root: str | None = None):
+        root = settings.ETL_DOCS_DIR if root is None else root
+        self.root = Path(root).expanduser() if root else None
+
+    def path(self, source: str) -> Path:
+        """Return the path of the markdown file a source refers to."""
+        parts = urlsplit(source)
+        if parts.scheme == "file":
+            return Path(unquote(parts.path))
+        if parts.scheme in ("http", "https"):
+            if self.root is None:
+                raise PermanentFetchError(
+                    f"No documentation checkout is configured to read '{source}'"
+                )
+            page = PurePosixPath(unquote(parts.path).lstrip("/"))
+            return self.root.joinpath(*page.with_suffix(".md").parts)
+        return Path(source)
+
+    def _read(self, source: str) -> str:
+        try:
+            return source_markdown_to_markdown(read_file(self.path(source)))
+        except FileNotFoundError as err:
+            raise PermanentFetchError(f"Read failed: {err}") from err
+        except (OSError, UnicodeDecodeError) as err:
+            raise RuntimeError(f"Read failed: {err}") from err
+
+    async def save_one(self, page: str) -> str:
+        """
+        This method is not implemented because the documentation
+        checkout is only read from.
+        """
+        raise NotImplementedError(
+            "FileRepository does not support saving a documentation page."
+        )
+
+    async def save_many(self, pages: list[str]) -> list[str]:
+        """
+        This method is not implemented because the documentation
+        checkout is only read from.
+        """
+        raise NotImplementedError(
+            "FileRepository does not support saving documentation pages."
+        )
+
+    @singledispatchmethod
+    async def get(self, query) -> str:
+        raise TypeError(f"Unsupported type for query: {type(query)}")
+
+    @get.register
+    async def _(self, query: str) -> str:
+        """
+        Given the source of a docpage, read it from the disk.
+        """
+        return await asyncio.to_thread(self._read, query)
+
+    @get.register
+    async def _(self, query: list) -> list[str]:
+        # All the files are read in one go on a worker thread
+        return await asyncio.to_thread(lambda: [self._read(source) for source in query])
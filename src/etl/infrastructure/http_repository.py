@@ -1,7 +1,7 @@
 from functools import singledispatchmethod
 
 from etl.domain.repositories import DocRepository
-from etl.infrastructure.utils import html_to_markdown
+from etl.infrastructure.utils import html_to_markdown, web_crawler
 
 
 class HttpRepository(DocRepository[str]):
@@ -30,9 +30,17 @@ class HttpRepository(DocRepository[str]):
     @get.register
     async def get(self, query: str) -> str:
         """
-        Given the source URL, fetch the content and convert it to markdown.
+        Given the source URL, fetch the content and convert it to markdown
+        with the browser session pooled for the process.
         """
         try:
-            return await html_to_markdown(query)
+            return await html_to_markdown(query, await web_crawler())
         except RuntimeError:
             raise
+
+    async def convert(self, html: str) -> str:
+        """
+        Convert an HTML docpage already downloaded to markdown,
+        rendering it in the pooled browser session without fetching it again.
+        """
+        return await html_to_markdown(f"raw:{html}", await web_crawler())
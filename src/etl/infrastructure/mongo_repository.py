@@ -2,9 +2,10 @@ from functools import singledispatchmethod
 
 from beanie import BulkWriter
 from beanie.operators import In
+from pymongo import UpdateOne
 
 from etl.domain.repositories import DocRepository
-from etl.domain.value_objects import Docpage
+from etl.domain.value_objects import Docpage, DocpageChanges, DocpageDigest
 from etl.infrastructure.exceptions import DocpageNotFoundError
 
 
@@ -39,6 +40,69 @@ class MongoRepository(DocRepository[Docpage]):
 
         return await Docpage.find_all().to_list()
 
+    async def sync_many(
+        self, pages: list[Docpage], keep: list[str] | None = None
+    ) -> DocpageChanges:
+        """
+        Make the collection hold exactly the given pages, writing only the pages
+        that are new or whose content hash changed and deleting the others,
+        except for the pages of the commands to keep.
+        Only the command and hash of the existing documents are read.
+        """
+        existing = await self.digests()
+        changes = await self.upsert_many(pages, existing)
+        changes.deleted = await self.prune(
+            existing, {page.command for page in pages} | set(keep or ())
+        )
+        return changes
+
+    async def digests(self) -> dict[str, str]:
+        """Return the content hash of every stored page, keyed by command."""
+        return {
+            digest.command: digest.content_hash
+            for digest in await Docpage.find_all(
+                projection_model=DocpageDigest
+            ).to_list()
+        }
+
+    async def upsert_many(
+        self, pages: list[Docpage], existing: dict[str, str]
+    ) -> DocpageChanges:
+        """
+        Write the given pages that are new or whose content hash differs
+        from the existing one, in a single bulk write.
+        """
+        changes = DocpageChanges()
+        operations = []
+        for page in pages:
+            if page.command not in existing:
+                changes.inserted.append(page.command)
+            elif existing[page.command] != page.content_hash:
+                changes.updated.append(page.command)
+            else:
+                changes.unchanged.append(page.command)
+                continue
+
+            operations.append(
+                UpdateOne(
+                    {"command": page.command},
+                    {"$set": page.model_dump(exclude={"id", "revision_id"})},
+                    upsert=True,
+                )
+            )
+
+        if operations:
+            await Docpage.get_pymongo_collection().bulk_write(operations, ordered=False)
+
+        return changes
+
+    async def prune(self, existing: dict[str, str], keep: set[str]) -> list[str]:
+        """Delete the existing pages whose command is not to be kept."""
+        deleted = sorted(existing.keys() - keep)
+        if deleted:
+            await Docpage.find(In(Docpage.command, deleted)).delete()
+        return deleted
+
     @singledispatchmethod
     async def get(self, query):
         raise TypeError(f"Unsupported type for query: {type(query)}")
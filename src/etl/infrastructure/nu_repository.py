@@ -0,0 +1,134 @@
+from functools import singledispatchmethod
+from pathlib import PurePosixPath
+from urllib.parse import unquote, urlsplit
+
+from etl.domain.repositories import DocRepository
+from etl.infrastructure.exceptions import PermanentFetchError
+from shared.infrastructure.nushell import NuCatalog
+
+NU_SCHEME = "nu"
+
+
+def _flag_spec(param: dict) -> str:
+    spec = f"--{param['parameter_name']}"
+    if param.get("short_flag"):
+        spec += f", -{param['short_flag']}"
+    if param.get("parameter_type") == "named" and param.get("syntax_shape"):
+        spec += f" {{{param['syntax_shape']}}}"
+    return spec
+
+
+def flag_params(record: dict) -> list[dict]:
+    """
+    Return the flags of a command as reported by `scope commands`,
+    leaving out the `--help` flag every command has.
+    """
+    signatures = record.get("signatures") or {}
+    params = next(iter(signatures.values()), []) if signatures else []
+    return [
+        param
+        for param in params
+        if param.get("parameter_type") in ("switch", "named")
+        and param.get("parameter_name") != "help"
+    ]
+
+
+def command_description(record: dict) -> str:
+    # Older Nushell versions call the description "usage"
+    return (record.get("description") or record.get("usage") or "").strip()
+
+
+def render_markdown(record: dict) -> str:
+    """
+    Render a command reported by `scope commands` as markdown laid out
+    like its page on the Nushell documentation website.
+    """
+    name = record["name"]
+    lines = [f"# `{name}` for {record.get('category') or 'default'}", ""]
+    lines += [command_description(record), ""]
+
+    lines += ["## Signature", "", f"```> {name} {{flags}}```", ""]
+
+    flags = flag_params(record)
+    if flags:
+        lines += ["## Flags", ""]
+        for param in flags:
+            lines.append(f" -  `{_flag_spec(param)}`: {param.get('description', '')}")
+        lines.append("")
+
+    examples = record.get("examples") or []
+    if examples:
+        lines += ["## Examples", ""]
+        for example in examples:
+            lines.append(" ".join(example.get("description", "").split()) or "example")
+            lines += ["```nu", f"> {example.get('example', '').strip()}", "```", ""]
+
+    return "\n".join(lines)
+
+
+class NuRepository(DocRepository[str]):
+    """
+    Reads command documentation from the locally installed Nushell,
+    so the docpages exactly match the version the user runs.
+
+    The whole catalog is reported by a single `nu` call, the first time
+    a docpage is requested. Sources are either `nu://<command>` or the URL
+    of the command's page on the Nushell website.
+    """
+
+    def __init__(self, binary: str = "nu"):
+        self._catalog = NuCatalog(binary)
+
+    async def catalog(self) -> dict[str, dict]:
+        """Return every command reported by Nushell, keyed by name."""
+        return await self._catalog.commands()
+
+    @staticmethod
+    def command_name(source: str) -> str:
+        """
+        Return the command a source refers to, e.g. `nu://str join` or
+        `https://www.nushell.sh/commands/docs/str_join.html` give `str join`.
+        """
+        parts = urlsplit(source)
+        if parts.scheme == NU_SCHEME:
+            return unquote(parts.netloc + parts.path)
+        if parts.scheme in ("http", "https", "file"):
+            return PurePosixPath(unquote(parts.path)).stem.replace("_", " ")
+        return source
+
+    async def save_one(self, page: str) -> str:
+        """
+        This method is not implemented because the documentation
+        comes from the Nushell binary itself.
+        """
+        raise NotImplementedError(
+            "NuRepository does not support saving a documentation page."
+        )
+
+    async def save_many(self, pages: list[str]) -> list[str]:
+        """
+        This method is not implemented because the documentation
+        comes from the Nushell binary itself.
+        """
+        raise NotImplementedError(
+            "NuRepository does not support saving documentation pages."
+        )
+
+    @singledispatchmethod
+    async def get(self, query) -> str:
+        raise TypeError(f"Unsupported type for query: {type(query)}")
+
+    @get.register
+    async def _(self, query: str) -> str:
+        """
+        Given the source of a command, render its documentation as markdown.
+        """
+        catalog = await self.catalog()
+        name = self.command_name(query)
+        if name not in catalog:
+            raise PermanentFetchError(f"Nushell has no command named '{name}'")
+        return render_markdown(catalog[name])
+
+    @get.register
+    async def _(self, query: list) -> list[str]:
+        return [await self.get(source) for source in query]
@@ -0,0 +1,93 @@
+import asyncio
+from functools import singledispatchmethod
+from importlib.util import find_spec
+
+import httpx
+
+from etl.domain.repositories import DocRepository
+from etl.infrastructure.converters import static_html_to_markdown
+from etl.infrastructure.exceptions import PermanentFetchError, is_permanent_status
+from shared.infrastructure.runtime import resource
+
+MAX_CONNECTIONS = 16
+TIMEOUT = 30.0
+
+
+def http_client(max_connections: int = MAX_CONNECTIONS) -> httpx.AsyncClient:
+    """
+    Build a pooled HTTP client: connections are kept alive between requests
+    and HTTP/2 is negotiated when the `h2` package is installed.
+    """
+    return httpx.AsyncClient(
+        http2=find_spec("h2") is not None,
+        follow_redirects=True,
+        timeout=TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+
+
+async def shared_http_client() -> httpx.AsyncClient:
+    """
+    Return the HTTP client pooled on the running event loop.
+    """
+
+    async def open_client() -> httpx.AsyncClient:
+        return http_client()
+
+    return await resource("httpx", open_client, close=lambda c: c.aclose())
+
+
+class StaticHttpRepository(DocRepository[str]):
+    """
+    Fetches docpages with a plain HTTP client and converts them to markdown
+    in-process, which is enough for static documentation sites such as Nushell's.
+    """
+
+    async def save_one(self, page: str) -> str:
+        """
+        This method is not implemented because documentation pages are typically
+        read from the remote endpoint and not saved back to it.
+        """
+        raise NotImplementedError(
+            "StaticHttpRepository does not support saving a documentation page."
+        )
+
+    async def save_many(self, pages: list[str]) -> list[str]:
+        """
+        This method is not implemented because documentation pages are typically
+        read from the remote endpoint and not saved back to it.
+        """
+        raise NotImplementedError(
+            "StaticHttpRepository does not support saving documentation pages."
+        )
+
+    @singledispatchmethod
+    async def get(self, query) -> str:
+        raise TypeError(f"Unsupported type for query: {type(query)}")
+
+    @get.register
+    async def _(self, query: str) -> str:
+        """
+        Given the source URL, fetch the HTML and convert it to markdown.
+        """
+        client = await shared_http_client()
+        try:
+            response = await client.get(query)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as err:
+            if is_permanent_status(err.response.status_code):
+                raise PermanentFetchError(f"Fetch failed: {err}") from err
+            raise RuntimeError(f"Fetch failed: {err}") from err
+        except httpx.HTTPError as err:
+            raise RuntimeError(f"Fetch failed: {err}") from err
+
+        return await self.convert(response.text)
+
+    async def convert(self, html: str) -> str:
+        """
+        Convert an HTML docpage already downloaded to markdown.
+        """
+        return await asyncio.to_thread(static_html_to_markdown, html)
@@ -5,9 +5,11 @@ from pymongo import AsyncMongoClient
 
 from config import settings
 from etl.domain.value_objects import Docpage
+from etl.infrastructure.exceptions import PermanentFetchError, is_permanent_status
+from shared.infrastructure.runtime import resource
 
 
-async def init_db():
+async def _connect_db() -> AsyncMongoClient:
     mongo_host = settings.MONGO_DATABASE_HOST
     mongo_db = settings.MONGO_DATABASE_NAME
 
@@ -17,18 +19,56 @@ async def init_db():
     # Initialize Beanie
     await init_beanie(database=client[mongo_db], document_models=[Docpage])
 
+    return client
 
-async def html_to_markdown(url):
-    config = CrawlerRunConfig(
+
+async def init_db() -> AsyncMongoClient:
+    """
+    Connect to MongoDB and initialize Beanie.
+    Both happen once per event loop, later calls reuse the pooled client.
+    """
+    return await resource("mongo", _connect_db, close=lambda client: client.close())
+
+
+async def _start_crawler() -> AsyncWebCrawler:
+    crawler = AsyncWebCrawler()
+    await crawler.start()
+    return crawler
+
+
+async def web_crawler() -> AsyncWebCrawler:
+    """
+    Return the headless browser session pooled on the running event loop.
+    """
+    return await resource("crawl4ai", _start_crawler, close=lambda c: c.close())
+
+
+def _crawler_run_config() -> CrawlerRunConfig:
+    return CrawlerRunConfig(
         verbose=False,
         markdown_generator=DefaultMarkdownGenerator(
             content_source="fit_html", options={"ignore_links": True}
         ),
     )
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=url, config=config)
 
-        if result.success:
-            return result.markdown
-        else:
-            raise RuntimeError(f"Crawl failed: {result.error_message}")
+
+async def html_to_markdown(url: str, crawler: AsyncWebCrawler | None = None) -> str:
+    """
+    Crawl the given URL and return its content as markdown.
+    If a crawler is given, its browser session is reused instead of
+    starting a new one just for this URL.
+    """
+    if crawler is None:
+        async with AsyncWebCrawler() as crawler:
+            return await html_to_markdown(url, crawler)
+
+    result = await crawler.arun(url=url, config=_crawler_run_config())
+
+    if result.status_code and is_permanent_status(result.status_code):
+        raise PermanentFetchError(
+            f"Crawl failed: HTTP {result.status_code} for '{url}'"
+        )
+    if result.success:
+        return result.markdown
+    else:
+        raise RuntimeError(f"Crawl failed: {result.error_message}")
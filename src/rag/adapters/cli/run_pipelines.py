@@ -18,7 +18,7 @@ Example:
     "--no-cache",
     is_flag=True,
     default=False,
-    help="Disable cache (default: cache enabled).",
+    help="Disable cache, recomputing every command (default: cache enabled).",
 )
 @click.option(
     "--config",
@@ -34,6 +34,9 @@ def run_rag(no_cache: bool, config: str):
     }
 
     run_args_rag = {}
+    if no_cache:
+        # Also recompute the stages whose results are cached by content hash
+        run_args_rag["use_cache"] = False
     pipeline_args["config_path"] = config
     pipeline_args["run_name"] = (
         f"docpage_rag_run_{dt.now().strftime('%Y_%m_%d:%H_%M_%S')}"
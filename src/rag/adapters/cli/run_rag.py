@@ -17,9 +17,8 @@ from yaspin.spinners import Spinners
 from config import settings
 from rag.application.use_cases.command_generator import CommandGenerator
 from rag.domain.policies.command_formatter import CommandFormatter
-from rag.infrastructure.encoder import Encoder
-from rag.infrastructure.qdrant_repository import QdrantRepository
-from rag.infrastructure.utils import configure_llm, qdrant_client
+from rag.infrastructure.embedding_cache import cached_encoder
+from rag.infrastructure.utils import configure_llm, qdrant_client, qdrant_repository
 
 if "NU_VERSION" not in os.environ:
     print_formatted_text(
@@ -101,13 +100,13 @@ async def cli():
 
     configure_llm(settings.LLM_NAME, settings.LLM_ENDPOINT)
     formatter = CommandFormatter()
-    encoder = Encoder(settings.QDRANT_EMBEDDING_MODEL)
+    encoder = cached_encoder(settings.QDRANT_EMBEDDING_MODEL)
 
     # Confirmation session with NO history: used for any follow-up prompts
     confirmation_session = PromptSession()
 
     async with qdrant_client(encoder.size) as client:
-        qdrant_repo = QdrantRepository(client, settings.QDRANT_COLLECTION_NAME)
+        qdrant_repo = qdrant_repository(client)
         generator = CommandGenerator(qdrant_repo, encoder, formatter)
 
         while True:
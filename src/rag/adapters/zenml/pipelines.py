@@ -4,30 +4,44 @@ from config import settings
 from etl.adapters.zenml.steps import retrieve_docs
 from rag.adapters.zenml.steps import (
     evaluate_programs,
+    introspect_commands,
     load_commands,
     load_plain_rag_programs,
     load_simple_rag_programs,
     optimize_programs,
+    parse_archived_contents,
     parse_contents,
 )
 from rag.infrastructure.utils import configure_llm
 
 
 @pipeline(enable_cache=False, settings={"orchestrator": {"synchronous": False}})
-def docpage_rag(doc_configs: list[dict[str, str]]) -> str:
+def docpage_rag(
+    doc_configs: list[dict[str, str]],
+    introspect: bool = False,
+    from_archive: bool = False,
+    use_cache: bool = True,
+) -> str:
     configure_llm(settings.LLM_NAME, settings.LLM_ENDPOINT)
 
     commands = [doc["command"] for doc in doc_configs]
-    docpages = retrieve_docs(commands)
-    commands = parse_contents(docpages)
-    _ = load_commands(doc_configs, commands)
+    if introspect:
+        # Read the commands from the installed Nushell instead of the docpages
+        commands = introspect_commands(commands)
+    elif from_archive:
+        # Parse the raw docpages of the last crawl straight into commands
+        commands = parse_archived_contents(doc_configs, use_cache=use_cache)
+    else:
+        docpages = retrieve_docs(commands)
+        commands = parse_contents(docpages, use_cache=use_cache)
+    _ = load_commands(doc_configs, commands, use_cache=use_cache)
 
-    simple_programs = load_simple_rag_programs(commands)
+    simple_programs = load_simple_rag_programs(commands, use_cache=use_cache)
     _ = evaluate_programs("Simple-Unoptimized", doc_configs, simple_programs)
-    optimized_simple_programs = optimize_programs(simple_programs)
+    optimized_simple_programs = optimize_programs(simple_programs, use_cache=use_cache)
     _ = evaluate_programs("Simple-Optimized", doc_configs, optimized_simple_programs)
 
-    plain_programs = load_plain_rag_programs(commands)
-    optimized_plain_programs = optimize_programs(plain_programs)
+    plain_programs = load_plain_rag_programs(commands, use_cache=use_cache)
+    optimized_plain_programs = optimize_programs(plain_programs, use_cache=use_cache)
     _ = evaluate_programs("Plain-Optimized", doc_configs, optimized_plain_programs)
     return None
@@ -1,11 +1,13 @@
+from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import json
 from typing import Annotated
 
 import dspy
+from loguru import logger
 import mlflow
-from zenml import step
+from zenml import get_step_context, step
 
+from etl.infrastructure.archive_repository import ArchiveRepository
 from rag.application.evaluators.evaluator import Evaluator
 from rag.application.loader import CommandLoader
 from rag.application.modules.plain_rag import PlainRAG
@@ -15,12 +17,18 @@ from rag.application.parser import DocpageService
 from rag.domain.entities import Command
 from rag.domain.policies.eval_metric import EvalMetric
 from rag.domain.services.context_builder import ContextBuilder
-from rag.domain.value_objects import CommandInstance
+from rag.domain.services.dataset_index import DatasetIndex
+from rag.domain.value_objects import IngestionReport
+from rag.infrastructure.dataset_repository import DatasetRepository
 from rag.infrastructure.materializers import (
     CommandMaterializer,
     ListCommandMaterializer,
     ListProgramMaterializer,
 )
+from rag.infrastructure.step_cache import StepCache, fingerprint, llm_fingerprint
+from shared.infrastructure.nushell import NuCatalog
+from shared.infrastructure.parallel import CHUNK_SIZE
+from shared.infrastructure.runtime import run
 
 
 @step(enable_cache=False, output_materializers={"parsed_content": CommandMaterializer})
@@ -34,23 +42,147 @@ def parse_content(docpage: dict[str, str]) -> Annotated[Command, "parsed_content
 )
 def parse_contents(
     docpages: list[dict[str, str]],
+    workers: int | None = 1,
+    chunk_size: int = CHUNK_SIZE,
+    use_cache: bool = True,
 ) -> Annotated[list[Command], "parsed_contents"]:
+    cache = StepCache("parse") if use_cache else None
     doc_contents = [docpage["content"] for docpage in docpages]
-    return DocpageService().parse_many(doc_contents)
+    outcomes = DocpageService().parse_batch(doc_contents, workers, chunk_size, cache)
+
+    # Commands whose docpage could not be parsed are left out
+    errors = {}
+    for docpage, outcome in zip(docpages, outcomes, strict=True):
+        if not outcome.ok:
+            logger.error(f"Failed to parse '{docpage['command']}': {outcome.error}")
+            errors[docpage["command"]] = outcome.error
+
+    metadata = {"errors": errors}
+    if cache is not None:
+        metadata["cache"] = cache.stats
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(output_name="parsed_contents", metadata=metadata)
+
+    return [outcome.value for outcome in outcomes if outcome.ok]
+
+
+@step(
+    enable_cache=False,
+    output_materializers={"parsed_contents": ListCommandMaterializer},
+)
+def parse_archived_contents(
+    doc_configs: list[dict[str, str]],
+    workers: int | None = 1,
+    chunk_size: int = CHUNK_SIZE,
+    use_cache: bool = True,
+) -> Annotated[list[Command], "parsed_contents"]:
+    cache = StepCache("parse") if use_cache else None
+    sources = [doc["source"] for doc in doc_configs]
+    raw_docs = run(ArchiveRepository().get(sources))
+    outcomes = DocpageService().parse_raw_batch(
+        [raw_doc.content for raw_doc in raw_docs], workers, chunk_size, cache
+    )
+
+    # Commands that were never archived or could not be parsed are left out
+    archived = {raw_doc.source for raw_doc in raw_docs}
+    missing = [doc["command"] for doc in doc_configs if doc["source"] not in archived]
+    errors = {}
+    for raw_doc, outcome in zip(raw_docs, outcomes, strict=True):
+        if not outcome.ok:
+            logger.error(f"Failed to parse '{raw_doc.source}': {outcome.error}")
+            errors[raw_doc.source] = outcome.error
+
+    metadata = {"missing": missing, "errors": errors}
+    if cache is not None:
+        metadata["cache"] = cache.stats
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(output_name="parsed_contents", metadata=metadata)
+
+    return [outcome.value for outcome in outcomes if outcome.ok]
+
+
+@step(
+    enable_cache=False,
+    output_materializers={"parsed_contents": ListCommandMaterializer},
+)
+def introspect_commands(
+    commands: list[str],
+) -> Annotated[list[Command], "parsed_contents"]:
+    catalog = run(NuCatalog().commands())
+
+    # Commands the installed Nushell does not know are left out
+    missing = [command for command in commands if command not in catalog]
+    for command in missing:
+        logger.error(f"Nushell has no command named '{command}'")
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name="parsed_contents", metadata={"missing": missing}
+    )
+
+    records = [catalog[command] for command in commands if command in catalog]
+    return DocpageService().parse_records(records)
+
+
+def _add_ingestion_metadata(output_name: str, report: IngestionReport) -> None:
+    metadata = {
+        **report.model_dump(),
+        "points_per_second": round(report.points_per_second, 1),
+    }
+    get_step_context().add_output_metadata(output_name=output_name, metadata=metadata)
 
 
 @step(enable_cache=False)
 def load_command(
-    doc_config: dict[str, str], command: Command
+    doc_config: dict[str, str], command: Command, use_cache: bool = True
 ) -> Annotated[None, "loaded_command"]:
-    CommandLoader().load_one(doc_config, command)
+    # Without the cache, commands are upserted even if unchanged in Qdrant
+    report = CommandLoader().load_one(doc_config, command, force=not use_cache)
+    _add_ingestion_metadata("loaded_command", report)
 
 
 @step(enable_cache=False)
 def load_commands(
-    doc_configs: list[dict[str, str]], commands: list[Command]
+    doc_configs: list[dict[str, str]], commands: list[Command], use_cache: bool = True
 ) -> Annotated[None, "loaded_commands"]:
-    CommandLoader().load_many(doc_configs, commands)
+    # Without the cache, commands are upserted even if unchanged in Qdrant
+    report = CommandLoader().load_many(doc_configs, commands, force=not use_cache)
+    _add_ingestion_metadata("loaded_commands", report)
+
+
+def _build_programs(
+    commands: list[Command],
+    module: type[dspy.Module],
+    build: Callable[[Command, str], dspy.Module],
+    use_cache: bool,
+) -> list[dspy.Module]:
+    """
+    Build a program of the module for every command, reusing the programs
+    built before from the same command, context and language model.
+    """
+    contexts = [ContextBuilder.build(command) for command in commands]
+    if not use_cache:
+        return [
+            build(command, context)
+            for command, context in zip(commands, contexts, strict=True)
+        ]
+
+    cache = StepCache("programs")
+    llm = llm_fingerprint()
+    programs = [
+        cache.program(
+            fingerprint(module.__name__, command.model_dump(mode="json"), context, llm),
+            lambda command=command, context=context: build(command, context),
+        )
+        for command, context in zip(commands, contexts, strict=True)
+    ]
+
+    get_step_context().add_output_metadata(
+        output_name="loaded_programs", metadata={"cache": cache.stats}
+    )
+    return programs
 
 
 @step(
@@ -58,12 +190,14 @@ def load_commands(
     output_materializers={"loaded_programs": ListProgramMaterializer},
 )
 def load_simple_rag_programs(
-    commands: list[Command],
+    commands: list[Command], use_cache: bool = True
 ) -> Annotated[list[dspy.Module], "loaded_programs"]:
-    return [
-        SimpleRAG(command, ContextBuilder.build(command), command.trainset)
-        for command in commands
-    ]
+    return _build_programs(
+        commands,
+        SimpleRAG,
+        lambda command, context: SimpleRAG(command, context, command.trainset),
+        use_cache,
+    )
 
 
 @step(
@@ -71,9 +205,9 @@ def load_simple_rag_programs(
     output_materializers={"loaded_programs": ListProgramMaterializer},
 )
 def load_plain_rag_programs(
-    commands: list[Command],
+    commands: list[Command], use_cache: bool = True
 ) -> Annotated[list[dspy.Module], "loaded_programs"]:
-    return [PlainRAG(command, ContextBuilder.build(command)) for command in commands]
+    return _build_programs(commands, PlainRAG, PlainRAG, use_cache)
 
 
 @step(enable_cache=False, experiment_tracker="mlflow_docker")
@@ -88,23 +222,13 @@ def evaluate_programs(
     with Evaluator(metric) as evaluator:
         tasks = []
 
-        for doc_config in doc_configs:
-            if "evalset" not in doc_config:
+        datasets = DatasetIndex(doc_configs, DatasetRepository().read)
+        for program in programs:
+            command = program.command.name
+            evalset = datasets.evalset(command)
+            if evalset is None:
                 continue
-
-            evalset_j = json.loads(doc_config["evalset"])
-            evalset = [
-                dspy.Example(
-                    instruction=example["instruction"],
-                    command=CommandInstance.model_validate(example["command"]),
-                ).with_inputs("instruction")
-                for example in evalset_j
-            ]
-
-            for program in programs:
-                if doc_config["command"] != program.command.name:
-                    continue
-                tasks.append((program, evalset, doc_config["command"]))
+            tasks.append((program, [example.to_dspy() for example in evalset], command))
 
         with ThreadPoolExecutor() as step_executor:
             future_to_task = {
@@ -139,15 +263,40 @@ def evaluate_programs(
     output_materializers={"optimized_programs": ListProgramMaterializer},
 )
 def optimize_programs(
-    programs: list[dspy.Module],
+    programs: list[dspy.Module], use_cache: bool = True
 ) -> Annotated[list[dspy.Module], "optimized_programs"]:
     mlflow.dspy.autolog()
 
     optimized_programs = []
+    cache = StepCache("optimize") if use_cache else None
+    llm = llm_fingerprint()
 
     metric = EvalMetric()
-    with BootstrapOptimizer(metric, metric_threshold=1.0) as optimizer:
+    metric_threshold = 1.0
+    with BootstrapOptimizer(metric, metric_threshold=metric_threshold) as optimizer:
         for program in programs:
-            optimized_programs.append(optimizer.optimize(program))
+            if cache is None:
+                optimized_programs.append(optimizer.optimize(program))
+                continue
+
+            # Programs are optimized again when they, their trainset,
+            # the optimizer or the language model change
+            key = fingerprint(
+                type(optimizer).__name__,
+                type(metric).__name__,
+                metric_threshold,
+                type(program).__name__,
+                program.command.model_dump(mode="json"),
+                program.dump_state(),
+                llm,
+            )
+            optimized_programs.append(
+                cache.program(key, lambda p=program: optimizer.optimize(p))
+            )
+
+    if cache is not None:
+        get_step_context().add_output_metadata(
+            output_name="optimized_programs", metadata={"cache": cache.stats}
+        )
 
     return optimized_programs
@@ -1,45 +1,82 @@
-import asyncio
-import json
+from loguru import logger
 
 from config import settings
 from rag.application.services.ingestor import IngestionService
 from rag.domain.entities import Command
-from rag.domain.policies.example_parser import ExampleParser
 from rag.domain.services.context_builder import ContextBuilder
-from rag.infrastructure.encoder import Encoder
-from rag.infrastructure.qdrant_repository import QdrantRepository
-from rag.infrastructure.utils import qdrant_client
+from rag.domain.services.dataset_index import DatasetIndex
+from rag.domain.value_objects import IngestionReport
+from rag.infrastructure.dataset_repository import DatasetRepository
+from rag.infrastructure.embedding_cache import cached_encoder
+from rag.infrastructure.utils import qdrant_client, qdrant_repository
+from shared.infrastructure.runtime import run
 
 
-async def ingest(contexts: list[str], payloads: list[Command]):
-    encoder = Encoder(settings.QDRANT_EMBEDDING_MODEL)
+async def ingest(
+    contexts: list[str],
+    payloads: list[Command],
+    keep: set[str] | None = None,
+    force: bool = False,
+) -> IngestionReport:
+    encoder = cached_encoder(settings.QDRANT_EMBEDDING_MODEL)
 
     async with qdrant_client(encoder.size) as client:
-        repository = QdrantRepository(client, settings.QDRANT_COLLECTION_NAME)
+        repository = qdrant_repository(client)
         ingestion_service = IngestionService(encoder, repository)
-        await ingestion_service.run(contexts, payloads)
+        return await ingestion_service.sync(contexts, payloads, keep, force)
 
 
 class CommandLoader:
-    def load_one(self, doc_config: dict[str, str], command: Command) -> None:
-        if doc_config["command"] == command.name and "trainset" in doc_config:
-            command.trainset = [
-                ExampleParser.parse(example)
-                for example in json.loads(doc_config["trainset"])
-            ]
-        context = ContextBuilder.build(command)
-        asyncio.run(ingest([context], [command]))
+    def __init__(self, datasets: DatasetRepository | None = None):
+        self._datasets = datasets or DatasetRepository()
+
+    @staticmethod
+    def _ingest(
+        commands: list[Command], keep: set[str] | None, force: bool
+    ) -> IngestionReport:
+        """
+        Sync the commands into Qdrant: only the new and changed commands
+        are encoded and upserted, unless forced.
+        """
+        report = run(ingest(ContextBuilder.build(commands), commands, keep, force))
+        logger.info(
+            f"Ingested {report.ingested}/{report.total} commands "
+            f"({report.unchanged} unchanged, {report.deleted} deleted) "
+            f"at {report.points_per_second:.1f} points/s "
+            f"(encode {report.encode_seconds:.2f}s, upsert {report.upsert_seconds:.2f}s)"
+        )
+        return report
+
+    def load_one(
+        self,
+        doc_config: dict[str, str],
+        command: Command,
+        force: bool = False,
+    ) -> IngestionReport:
+        if doc_config["command"] == command.name:
+            trainset = DatasetIndex([doc_config], self._datasets.read).trainset(
+                command.name
+            )
+            if trainset is not None:
+                command.trainset = trainset
+        return self._ingest([command], None, force)
 
     def load_many(
-        self, doc_configs: list[dict[str, str]], commands: list[Command]
-    ) -> None:
+        self,
+        doc_configs: list[dict[str, str]],
+        commands: list[Command],
+        force: bool = False,
+    ) -> IngestionReport:
+        """
+        Load the commands into Qdrant along with their trainsets, deleting
+        the commands that are no longer configured. Configured commands that
+        are missing, e.g. since their docpage could not be parsed, are kept.
+        """
+        datasets = DatasetIndex(doc_configs, self._datasets.read)
         for command in commands:
-            for doc_config in doc_configs:
-                if doc_config["command"] == command.name and "trainset" in doc_config:
-                    command.trainset = [
-                        ExampleParser.parse(example)
-                        for example in json.loads(doc_config["trainset"])
-                    ]
-
-        contexts = ContextBuilder.build(commands)
-        asyncio.run(ingest(contexts, commands))
+            trainset = datasets.trainset(command.name)
+            if trainset is not None:
+                command.trainset = trainset
+
+        keep = {str(Command.id_for(doc["command"])) for doc in doc_configs}
+        return self._ingest(commands, keep, force)
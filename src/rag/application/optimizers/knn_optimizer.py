@@ -3,9 +3,9 @@ import math
 
 import dspy
 from dspy.teleprompt import KNNFewShot
-from sentence_transformers import SentenceTransformer
 
 from config import settings
+from rag.infrastructure.embedding_cache import cached_encoder
 
 
 class KNNOptimizer:
@@ -21,7 +21,7 @@ class KNNOptimizer:
         self._max_labeled_demos = max_labeled_demos
         self._max_bootstrapped_demos = max_bootstrapped_demos
         self._vectorizer = dspy.Embedder(
-            SentenceTransformer(settings.QDRANT_EMBEDDING_MODEL).encode
+            cached_encoder(settings.QDRANT_EMBEDDING_MODEL).encode
         )
 
     def __enter__(self):
@@ -1,5 +1,50 @@
 from rag.domain.entities import Command
 from rag.domain.services.docpage_parser import DocpageParser
+from rag.domain.services.raw_docpage_parser import RawDocpageParser
+from rag.domain.services.signature_parser import SignatureParser
+from rag.infrastructure.step_cache import StepCache, fingerprint
+from shared.infrastructure.parallel import CHUNK_SIZE, Outcome, parallel_map
+
+
+def _parse(doc_content: str) -> Command:
+    return DocpageParser().parse(doc_content)
+
+
+def _parse_raw(raw_doc: str) -> Command:
+    return RawDocpageParser().parse_raw(raw_doc)
+
+
+def _parse_cached(
+    parse,
+    docs: list[str],
+    workers: int | None,
+    chunk_size: int,
+    cache: StepCache | None,
+) -> list[Outcome[Command]]:
+    """
+    Parse the documents that are not cached yet, in parallel, and cache the
+    commands they give. Documents that failed to be parsed are not cached.
+    """
+    if cache is None:
+        return parallel_map(parse, docs, workers, chunk_size)
+
+    keys = [fingerprint(parse.__name__, doc) for doc in docs]
+    outcomes = [None] * len(docs)
+    misses = []
+    for index, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is None:
+            misses.append(index)
+        else:
+            outcomes[index] = Outcome(Command.model_validate(cached))
+
+    parsed = parallel_map(parse, [docs[i] for i in misses], workers, chunk_size)
+    for index, outcome in zip(misses, parsed, strict=True):
+        outcomes[index] = outcome
+        if outcome.ok:
+            cache.put(keys[index], outcome.value.model_dump(mode="json"))
+
+    return outcomes
 
 
 class DocpageService:
@@ -22,3 +67,37 @@ class DocpageService:
             parsed_contents.append(DocpageParser().parse(doc_content))
 
         return parsed_contents
+
+    def parse_batch(
+        self,
+        doc_contents: list[str],
+        workers: int | None = 1,
+        chunk_size: int = CHUNK_SIZE,
+        cache: StepCache | None = None,
+    ) -> list[Outcome[Command]]:
+        """
+        Parse multiple documents' contents, spreading chunks of them over
+        `workers` processes. A document that fails to be parsed is reported
+        in its outcome. With a cache, documents parsed before are not parsed again.
+        """
+        return _parse_cached(_parse, doc_contents, workers, chunk_size, cache)
+
+    def parse_raw_batch(
+        self,
+        raw_docs: list[str],
+        workers: int | None = 1,
+        chunk_size: int = CHUNK_SIZE,
+        cache: StepCache | None = None,
+    ) -> list[Outcome[Command]]:
+        """
+        Parse multiple raw documents, as they were crawled, without cleaning
+        them first. A document that fails to be parsed is reported in its outcome.
+        With a cache, documents parsed before are not parsed again.
+        """
+        return _parse_cached(_parse_raw, raw_docs, workers, chunk_size, cache)
+
+    def parse_records(self, records: list[dict]) -> list[Command]:
+        """
+        Build commands straight from the records Nushell reports for them.
+        """
+        return [SignatureParser().parse_record(record) for record in records]
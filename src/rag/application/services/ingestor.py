@@ -1,51 +1,194 @@
 import asyncio
+import hashlib
+import json
+import time
 
 from loguru import logger
 
 from rag.domain.entities import Command
+from rag.domain.value_objects import IngestionReport
+from rag.infrastructure.embedding_cache import CachedEncoder
 from rag.infrastructure.encoder import Encoder
 from rag.infrastructure.qdrant_repository import QdrantRepository
 
 BATCH_SIZE = 64
 QUEUE_SIZE = 5
 
+# Batches upserted at the same time
+CONSUMERS = 2
+
+# Attempts after the first one for a batch whose upsert failed,
+# with an exponential backoff between them: 0.5s, 1s, 2s...
+RETRIES = 2
+BACKOFF = 0.5
+
 
 class IngestionService:
+    """
+    Encodes commands and upserts them into the vector store as a pipeline.
+
+    A producer encodes one batch after the other while several consumers
+    upsert the batches already encoded, so encoding a batch overlaps the
+    upserts of the batches before it. The bounded queue between them holds
+    back the encoding when the upserts fall behind.
+    A batch whose upsert still fails after its retries is reported and does
+    not fail the others.
+
+    With `sync`, only the commands that changed since they were stored are
+    encoded and upserted, and the points of the commands that are gone are
+    deleted, so refreshing the collection costs as much as the change.
+    """
+
     def __init__(
         self,
-        encoder: Encoder,
+        encoder: Encoder | CachedEncoder,
         repository: QdrantRepository,
         batch_size: int = BATCH_SIZE,
         queue_size: int = QUEUE_SIZE,
+        consumers: int = CONSUMERS,
+        retries: int = RETRIES,
     ):
         self.encoder = encoder
         self.repository = repository
-        self.batch_size = batch_size
-        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.consumers = max(1, consumers)
+        self.retries = max(0, retries)
+
+    def payload_hash(self, context: str, payload: Command) -> str:
+        """Hash of what the point of a command is built from, its vector included."""
+        content = json.dumps(
+            [self.encoder.model_name, context, payload.model_dump(mode="json")],
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    async def run(
+        self, contexts: list[str], payloads: list[Command]
+    ) -> IngestionReport:
+        """Encode and upsert all the commands."""
+        start = time.perf_counter()
+        report = IngestionReport(total=len(payloads))
+        await self._ingest(contexts, payloads, None, report)
+        report.elapsed_seconds = time.perf_counter() - start
+        return report
+
+    async def sync(
+        self,
+        contexts: list[str],
+        payloads: list[Command],
+        keep: set[str] | None = None,
+        force: bool = False,
+    ) -> IngestionReport:
+        """
+        Bring the collection in line with the commands: encode and upsert those
+        that are new or changed (all of them if forced). When the ids of the
+        points to keep are given, e.g. of all the configured commands, the
+        points that are neither kept nor among the commands are deleted.
+        """
+        start = time.perf_counter()
+        report = IngestionReport(total=len(payloads))
+
+        # Without points to delete, only the points of the commands are read,
+        # so refreshing a few commands does not scroll the whole collection
+        ids = None if keep is not None else [str(payload.id) for payload in payloads]
+        stored = await self.repository.hashes(ids)
+        hashes = [
+            self.payload_hash(context, payload)
+            for context, payload in zip(contexts, payloads, strict=True)
+        ]
+        changed = [
+            i
+            for i, payload in enumerate(payloads)
+            if force or stored.get(str(payload.id)) != hashes[i]
+        ]
+        report.unchanged = len(payloads) - len(changed)
 
-    async def run(self, contexts: list[str], payloads: list[Command]):
+        await self._ingest(
+            [contexts[i] for i in changed],
+            [payloads[i] for i in changed],
+            [hashes[i] for i in changed],
+            report,
+        )
+
+        if keep is not None:
+            keep = keep | {str(payload.id) for payload in payloads}
+            stale = [point_id for point_id in stored if point_id not in keep]
+            report.deleted = await self.repository.delete_many(stale)
+
+        report.elapsed_seconds = time.perf_counter() - start
+        return report
+
+    async def _ingest(
+        self,
+        contexts: list[str],
+        payloads: list[Command],
+        hashes: list[str] | None,
+        report: IngestionReport,
+    ) -> None:
         queue = asyncio.Queue(maxsize=self.queue_size)
 
         async def producer():
             for i in range(0, len(contexts), self.batch_size):
                 batched_contexts = contexts[i : i + self.batch_size]
+                batched_payloads = payloads[i : i + self.batch_size]
+                batched_hashes = hashes[i : i + self.batch_size] if hashes else None
 
                 # Encode batch in thread pool to avoid blocking
+                encode_start = time.perf_counter()
                 vectors = await asyncio.to_thread(
                     self.encoder.encode_many, batched_contexts
                 )
+                report.encode_seconds += time.perf_counter() - encode_start
+
+                await queue.put((vectors, batched_payloads, batched_hashes))
 
-                await queue.put((vectors, payloads))
-            await queue.put(None)
+            for _ in range(self.consumers):
+                await queue.put(None)
 
         async def consumer():
-            while True:
-                batch = await queue.get()
-                if batch is None:
-                    break
-                vectors, payloads = batch
-                success = await self.repository.save_many(vectors, payloads)
-                if not success:
-                    logger.warning("batch upsert failed!")
-
-        await asyncio.gather(producer(), consumer())
+            while (batch := await queue.get()) is not None:
+                vectors, batched_payloads, batched_hashes = batch
+                try:
+                    await self._upsert(
+                        vectors, batched_payloads, batched_hashes, report
+                    )
+                except Exception as err:
+                    logger.error(f"Failed to upsert a batch of {len(vectors)}: {err}")
+                    for payload in batched_payloads:
+                        report.failed[payload.name] = f"{type(err).__name__}: {err}"
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(producer())
+            for _ in range(self.consumers):
+                group.create_task(consumer())
+
+    async def _upsert(
+        self,
+        vectors: list[list[float]],
+        payloads: list[Command],
+        hashes: list[str] | None,
+        report: IngestionReport,
+    ) -> None:
+        """Upsert a batch, retrying it on failure."""
+        for attempt in range(self.retries + 1):
+            upsert_start = time.perf_counter()
+            try:
+                error = None
+                if not await self.repository.save_many(vectors, payloads, hashes):
+                    error = RuntimeError("Upsert did not complete")
+            except Exception as err:
+                error = err
+            report.upsert_seconds += time.perf_counter() - upsert_start
+
+            if error is None:
+                report.ingested += len(payloads)
+                report.batches += 1
+                return
+            if attempt == self.retries:
+                raise error
+
+            delay = BACKOFF * 2**attempt
+            logger.warning(f"Batch upsert failed ({error}), retrying in {delay}s")
+            report.retries += 1
+            await asyncio.sleep(delay)
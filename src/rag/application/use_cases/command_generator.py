@@ -2,6 +2,7 @@ from rag.application.modules.simple_rag import SimpleRAG
 from rag.domain.policies.command_formatter import CommandFormatter
 from rag.domain.policies.command_selector import CommandSelector, ThresholdStrategy
 from rag.domain.services.context_builder import ContextBuilder
+from rag.infrastructure.embedding_cache import CachedEncoder
 from rag.infrastructure.encoder import Encoder
 from rag.infrastructure.qdrant_repository import QdrantRepository
 
@@ -10,7 +11,7 @@ class CommandGenerator:
     def __init__(
         self,
         qdrant_repo: QdrantRepository,
-        encoder: Encoder,
+        encoder: Encoder | CachedEncoder,
         formatter: CommandFormatter,
     ):
         self._qdrant_repo = qdrant_repo
@@ -26,5 +27,7 @@ class CommandGenerator:
         if not command:
             return ""
 
+        # Only the selected command is read whole
+        command = await self._qdrant_repo.hydrate(command)
         program = SimpleRAG(command, ContextBuilder.build(command), command.trainset)
         return self._formatter.format(program(instruction).command)
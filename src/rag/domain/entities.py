@@ -1,4 +1,4 @@
-from uuid import UUID
+from uuid import NAMESPACE_DNS, UUID, uuid5
 
 from pydantic import BaseModel, Field
 
@@ -12,5 +12,10 @@ class Command(BaseModel):
     flags: list[Flag] = Field(default_factory=list)
     trainset: list[Example] = Field(default_factory=list)
 
+    @staticmethod
+    def id_for(name: str) -> UUID:
+        """The id of the command of the given name, the same on every run."""
+        return uuid5(NAMESPACE_DNS, name)
+
     def __bool__(self) -> bool:
         return self.id != UUID(int=0) or bool(self.name)
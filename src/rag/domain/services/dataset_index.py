@@ -0,0 +1,73 @@
+from collections.abc import Callable, Iterable
+from functools import partial
+import json
+
+from rag.domain.policies.example_parser import ExampleParser
+from rag.domain.value_objects import Example
+
+
+class DatasetIndex:
+    """
+    Training and evaluation examples of the doc configs, keyed by command name.
+
+    A dataset is either inlined in its doc config as a JSON string (`trainset`,
+    `evalset`) or kept in a file the doc config refers to (`trainset_file`,
+    `evalset_file`), streamed through the given reader.
+
+    Every dataset is parsed once, the first time it is looked up, and then shared
+    by all the lookups of its command. As when joining the doc configs with the
+    commands one by one, the last doc config of a command takes precedence.
+    """
+
+    DATASETS = ("trainset", "evalset")
+
+    def __init__(
+        self,
+        doc_configs: list[dict[str, str]],
+        reader: Callable[[str], Iterable[dict]] | None = None,
+    ):
+        self._sources = {dataset: {} for dataset in self.DATASETS}
+        for doc_config in doc_configs:
+            for dataset in self.DATASETS:
+                source = self._source(doc_config, dataset, reader)
+                if source is not None:
+                    self._sources[dataset][doc_config["command"]] = source
+        self._parsed = {dataset: {} for dataset in self.DATASETS}
+
+    @staticmethod
+    def _source(
+        doc_config: dict[str, str],
+        dataset: str,
+        reader: Callable[[str], Iterable[dict]] | None,
+    ) -> Callable[[], Iterable[dict]] | None:
+        """Return how to read the raw examples of a dataset of the doc config."""
+        if dataset in doc_config:
+            return partial(json.loads, doc_config[dataset])
+
+        file = doc_config.get(f"{dataset}_file")
+        if file is None:
+            return None
+        if reader is None:
+            raise ValueError(
+                f"No reader for the {dataset} file of {doc_config['command']}: {file}"
+            )
+        return partial(reader, file)
+
+    def _get(self, dataset: str, command: str) -> list[Example] | None:
+        parsed = self._parsed[dataset]
+        if command not in parsed:
+            source = self._sources[dataset].get(command)
+            parsed[command] = (
+                None
+                if source is None
+                else [ExampleParser.parse(example) for example in source()]
+            )
+        return parsed[command]
+
+    def trainset(self, command: str) -> list[Example] | None:
+        """Training examples of the command, or None if it has no trainset."""
+        return self._get("trainset", command)
+
+    def evalset(self, command: str) -> list[Example] | None:
+        """Evaluation examples of the command, or None if it has no evalset."""
+        return self._get("evalset", command)
@@ -1,12 +1,12 @@
 import re
 import shlex
-import uuid
 
 from rag.domain.entities import Command
 
 
 class DocpageParser:
     PLACEHOLDER_RE = re.compile(r"\{[^}]+\}")
+    FLAG_LINE_RE = re.compile(r"^[\*\-\u2022]?\s*`([^`]+)`\s*:\s*(.+)$")
 
     def __init__(self):
         self._flags_table = {}
@@ -45,7 +45,6 @@ class DocpageParser:
         Assumes the cleaner has already removed short flags.
         """
         flags = []
-        FLAG_LINE_RE = re.compile(r"^[\*\-\u2022]?\s*`([^`]+)`\s*:\s*(.+)$")
 
         i = start_index
         while i < len(lines):
@@ -56,17 +55,24 @@ class DocpageParser:
             if re.match(r"^#{1,6}", line):
                 break
 
-            m = FLAG_LINE_RE.match(line)
-            if m:
-                long_flag_with_args = m.group(1).strip()
-                desc = m.group(2).strip()
-                long_plain = self.PLACEHOLDER_RE.sub("", long_flag_with_args).strip()
-                flags.append({"name": long_flag_with_args, "desc": desc})
-                self._flags_table[long_plain] = desc
+            flag = self._parse_flag_line(line)
+            if flag:
+                flags.append(flag)
             i += 1
 
         return flags
 
+    def _parse_flag_line(self, line: str) -> dict | None:
+        """Parse a line of the flags section, recording the flag in the flags table."""
+        m = self.FLAG_LINE_RE.match(line)
+        if not m:
+            return None
+        long_flag_with_args = m.group(1).strip()
+        desc = m.group(2).strip()
+        long_plain = self.PLACEHOLDER_RE.sub("", long_flag_with_args).strip()
+        self._flags_table[long_plain] = desc
+        return {"name": long_flag_with_args, "desc": desc}
+
     def _merge_parentheses_tokens(self, tokens: list[str]) -> list[str]:
         """Merge tokens that are inside parentheses into a single token."""
         merged = []
@@ -90,7 +96,10 @@ class DocpageParser:
 
     def _parse_example_command(self, example_code: str) -> dict | None:
         """Parse a single example command line into structured format."""
-        tokens = shlex.split(example_code.strip())
+        return self._parse_example_tokens(shlex.split(example_code.strip()))
+
+    def _parse_example_tokens(self, tokens: list[str]) -> dict | None:
+        """Parse the shell tokens of an example command into structured format."""
         tokens = self._merge_parentheses_tokens(tokens)
         if not tokens:
             return None
@@ -155,10 +164,6 @@ class DocpageParser:
                 i += 1
         return examples
 
-    @staticmethod
-    def _construct_id(command: str) -> str:
-        return str(uuid.uuid5(uuid.NAMESPACE_DNS, command))
-
     def parse(self, md_text: str) -> Command:
         """Public entry point to parse a cleaned markdown docpage into structured JSON."""
         self._flags_table = {}
@@ -192,6 +197,6 @@ class DocpageParser:
             command["trainset"] = self._parse_examples(lines, examples_start)
 
         # Construct an ID from the command name
-        command["id"] = DocpageParser._construct_id(command["name"])
+        command["id"] = Command.id_for(command["name"])
 
         return Command.model_validate(command)
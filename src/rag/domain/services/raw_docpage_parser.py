@@ -0,0 +1,184 @@
+import re
+
+from rag.domain.entities import Command
+from rag.domain.services.docpage_parser import DocpageParser
+from shared.domain.docpage_text import (
+    ALLOWED_SUBHEADINGS,
+    SUBHEADING_RE,
+    expand_combined_short_flags,
+    needs_resplit,
+    normalize_example,
+    split_example,
+    strip_short_forms,
+)
+
+
+class RawDocpageParser(DocpageParser):
+    """
+    Parses a raw docpage, as it was crawled, straight into a command.
+
+    The document is cleaned and parsed in a single pass over its lines, giving
+    the same command as parsing the output of the ETL cleaner, whose tokenizing
+    it shares (`shared.domain.docpage_text`), but
+    without building, joining and splitting the cleaned document again.
+    Only the examples are revisited at the end, once the short forms of all
+    the flags are known.
+    """
+
+    NAME_RE = re.compile(r"^#{1,6}\s*`([^`]+)`")
+    HEADING_PREFIX_RE = re.compile(r"^#{1,6}\s*")
+
+    @staticmethod
+    def _resplit_unchanged(tokens: list[str]) -> bool:
+        """
+        Whether splitting the cleaned example line again gives back its tokens,
+        so the parser can take them as they are.
+        """
+        if needs_resplit(tokens):
+            return False
+        # The parser strips any '>' left at the start of the command
+        return not (tokens and tokens[0].startswith(">"))
+
+    def parse_raw(self, raw_text: str) -> Command:
+        """Public entry point to parse a raw markdown docpage into structured JSON."""
+        self._flags_table = {}
+        synonyms: dict[str, str] = {}
+
+        start = raw_text.find("# ")
+        if start < 0:
+            raise ValueError("Command name not found in markdown.")
+
+        # Lines the cleaner keeps, with the examples it rewrites once all
+        # the flags are known, by index: their prompt and shell tokens
+        # (the prompt is no longer used once the example is rewritten)
+        lines = []
+        rewritten = {}
+        section = None
+        keep_section = True
+
+        name = None
+        desc_index = None
+        last_filled = None
+
+        # The parser reads the flags and examples after the last heading
+        # naming them, the flags up to the next heading
+        flags = []
+        flags_table = {}
+        in_flags = False
+
+        # Examples are found by their code fence: `scan` for the opening fence,
+        # `code` for the line that follows it and `skip` up to the closing fence
+        examples = []
+        example_state = None
+        caption_index = None
+
+        for line in raw_text[start:].splitlines():
+            stripped = line.strip()
+
+            # Cleaning
+            heading_match = SUBHEADING_RE.match(stripped)
+            if heading_match:
+                section = heading_match.group(2).strip().lower()
+                keep_section = section in ALLOWED_SUBHEADINGS
+                if not keep_section:
+                    continue
+            elif not keep_section:
+                continue
+            elif section == "flags":
+                line = strip_short_forms(line, synonyms)
+                stripped = line.strip()
+            elif section == "examples" and stripped.startswith(">"):
+                prefix, tokens = split_example(line)
+                tokens = expand_combined_short_flags(tokens)
+                rewritten[len(lines)] = (prefix, tokens)
+                line = prefix + " ".join(tokens)
+                stripped = line.strip()
+
+            index = len(lines)
+            lines.append(line)
+
+            # Parsing
+            if name is None:
+                name_match = self.NAME_RE.match(stripped)
+                if name_match:
+                    name = name_match.group(1).strip()
+            if desc_index is None and index > 0 and stripped:
+                desc_index = index
+
+            is_heading = stripped.startswith("#")
+            heading = (
+                self.HEADING_PREFIX_RE.sub("", stripped).lower() if is_heading else ""
+            )
+            opens_flags = "flags" in heading
+            opens_examples = not opens_flags and "examples" in heading
+
+            if example_state and not opens_examples:
+                if example_state == "scan":
+                    if stripped.startswith("```"):
+                        caption_index = last_filled
+                        example_state = "code"
+                elif example_state == "code":
+                    if stripped.startswith(">"):
+                        examples.append((caption_index, index))
+                    example_state = "scan" if stripped.startswith("```") else "skip"
+                elif stripped.startswith("```"):
+                    example_state = "scan"
+
+            if in_flags and stripped and not is_heading:
+                flag = self._parse_flag_line(stripped)
+                if flag:
+                    flags.append(flag)
+
+            if opens_flags:
+                self._flags_table = flags_table = {}
+                flags = []
+                in_flags = True
+            elif is_heading:
+                in_flags = False
+                if opens_examples:
+                    examples = []
+                    example_state = "scan"
+
+            if stripped:
+                last_filled = index
+
+        # Short flags are only known once the whole 'Flags' section was read
+        if synonyms:
+            for i, (prefix, tokens) in rewritten.items():
+                lines[i], tokens = normalize_example(prefix, tokens, synonyms)
+                rewritten[i] = (prefix, tokens)
+
+        if name is None:
+            raise ValueError("Command name not found in markdown.")
+
+        self._flags_table = flags_table
+        trainset = []
+        for caption_at, code_at in examples:
+            tokens = rewritten[code_at][1] if code_at in rewritten else None
+
+            if tokens is None or not self._resplit_unchanged(tokens):
+                code_text = lines[code_at].strip().lstrip("> ").strip()
+                # Skip examples containing pipes
+                if "|" in code_text:
+                    continue
+                parsed_cmd = self._parse_example_command(code_text)
+            elif any("|" in tok for tok in tokens):
+                continue
+            else:
+                parsed_cmd = self._parse_example_tokens(tokens)
+
+            if parsed_cmd:
+                caption = (
+                    lines[caption_at].strip() if caption_at is not None else "example"
+                )
+                trainset.append({"instruction": caption, "command": parsed_cmd})
+
+        command = {
+            "id": Command.id_for(name),
+            "name": name,
+            "desc": lines[desc_index].strip() if desc_index is not None else "",
+            "flags": flags,
+            "trainset": trainset,
+        }
+
+        return Command.model_validate(command)
@@ -0,0 +1,85 @@
+import shlex
+
+from rag.domain.entities import Command
+from rag.domain.services.docpage_parser import DocpageParser
+
+
+class SignatureParser(DocpageParser):
+    """
+    Builds a command straight from the record Nushell reports for it
+    with `scope commands`, without going through a markdown docpage.
+    Flags and examples are normalized the way the docpage cleaner does.
+    """
+
+    def _parse_signature_flags(self, record: dict) -> tuple[list[dict], dict]:
+        """Return the flags of the command and the long form of its short flags."""
+        signatures = record.get("signatures") or {}
+        params = next(iter(signatures.values()), []) if signatures else []
+
+        flags = []
+        synonyms = {}
+        for param in params:
+            if param.get("parameter_type") not in ("switch", "named"):
+                continue
+            if param.get("parameter_name") == "help":
+                continue
+
+            long_plain = f"--{param['parameter_name']}"
+            name = long_plain
+            if param.get("parameter_type") == "named" and param.get("syntax_shape"):
+                name += f" {{{param['syntax_shape']}}}"
+            desc = (param.get("description") or "").strip()
+
+            flags.append({"name": name, "desc": desc})
+            self._flags_table[long_plain] = desc
+            if param.get("short_flag"):
+                synonyms[f"-{param['short_flag']}"] = long_plain
+
+        return flags, synonyms
+
+    @staticmethod
+    def _normalize_example(example: str, synonyms: dict[str, str]) -> str:
+        """Expand combined short flags and replace short flags by long ones."""
+        tokens = []
+        for tok in shlex.split(example):
+            if tok.startswith("-") and not tok.startswith("--") and len(tok) > 2:
+                tokens.extend(f"-{c}" for c in tok[1:])
+            else:
+                tokens.append(tok)
+        return " ".join(synonyms.get(tok, tok) for tok in tokens)
+
+    def parse_record(self, record: dict) -> Command:
+        """Public entry point to build a command from its `scope commands` record."""
+        self._flags_table = {}
+        description = record.get("description") or record.get("usage") or ""
+        command = {
+            "name": record["name"],
+            "desc": description.strip().split("\n", 1)[0].strip(),
+            "flags": [],
+            "trainset": [],
+        }
+
+        command["flags"], synonyms = self._parse_signature_flags(record)
+
+        for example in record.get("examples") or []:
+            code_text = (example.get("example") or "").strip().split("\n", 1)[0]
+            # Skip examples containing pipes
+            if not code_text or "|" in code_text:
+                continue
+            try:
+                parsed_cmd = self._parse_example_command(
+                    self._normalize_example(code_text, synonyms)
+                )
+            except ValueError:
+                # Unbalanced quotes
+                continue
+            if parsed_cmd:
+                caption = " ".join((example.get("description") or "").split())
+                caption = caption or "example"
+                command["trainset"].append(
+                    {"instruction": caption, "command": parsed_cmd}
+                )
+
+        command["id"] = Command.id_for(command["name"])
+
+        return Command.model_validate(command)
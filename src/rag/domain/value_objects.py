@@ -28,3 +28,34 @@ class Example(BaseModel):
 class Flag(BaseModel):
     name: str
     desc: str
+
+
+class IngestionReport(BaseModel):
+    """Outcome and throughput of the ingestion of commands into the vector store."""
+
+    # Number of points to ingest, and how many of them were upserted
+    total: int = 0
+    ingested: int = 0
+
+    # Points a sync left alone since they did not change, and stale points it deleted
+    unchanged: int = 0
+    deleted: int = 0
+
+    # Error message of the commands whose batch failed, keyed by command
+    failed: dict[str, str] = Field(default_factory=dict)
+
+    # Number of batches upserted, and of upsert retries over all of them
+    batches: int = 0
+    retries: int = 0
+
+    # Seconds spent encoding and upserting, summed over the batches: upserts
+    # run concurrently and overlap the encoding, so they exceed the elapsed time
+    encode_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def points_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.ingested / self.elapsed_seconds
@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+import sqlite3
+import threading
+
+from rag.domain.entities import Command
+
+
+class CommandStore:
+    """
+    Local SQLite store of the full commands, flags and trainset included,
+    for collections whose points only hold the header of their command.
+
+    Lookups are by the id of the point, so hydrating the command that won
+    a query is a single primary key read.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS commands "
+            "(id TEXT PRIMARY KEY, command TEXT NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def ids(self) -> set[str]:
+        with self._lock:
+            return {
+                row[0] for row in self._connection.execute("SELECT id FROM commands")
+            }
+
+    def get(self, command_id: str) -> Command | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT command FROM commands WHERE id = ?", (command_id,)
+            ).fetchone()
+        return None if row is None else Command.model_validate_json(row[0])
+
+    def save_many(self, commands: list[Command]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO commands (id, command) VALUES (?, ?)",
+                [(str(command.id), command.model_dump_json()) for command in commands],
+            )
+
+    def delete_many(self, ids: list[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM commands WHERE id = ?",
+                [(command_id,) for command_id in ids],
+            )
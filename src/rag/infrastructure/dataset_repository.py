@@ -0,0 +1,83 @@
+from collections.abc import Iterator
+import json
+import os
+from pathlib import Path
+
+from config import settings
+
+# Rows read at a time from a Parquet file
+BATCH_SIZE = 1024
+
+
+def _drop_nulls(value):
+    """
+    Drop the null fields of Parquet structs, which stand for fields an example
+    does not set, so the defaults of the examples apply to them.
+    """
+    if isinstance(value, dict):
+        return {
+            key: _drop_nulls(item) for key, item in value.items() if item is not None
+        }
+    if isinstance(value, list):
+        return [_drop_nulls(item) for item in value]
+    return value
+
+
+class DatasetRepository:
+    """
+    Reads the trainsets and evalsets kept outside the pipeline configuration,
+    one file per command and dataset, so they are neither parsed with the
+    configuration nor recorded with the pipeline runs.
+
+    Files are either JSON Lines, one example per line, or Parquet with an
+    `instruction` column and a `command` column (a struct or its JSON string).
+    Examples are streamed: a file is never read whole in memory.
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None):
+        directory = settings.RAG_DATASETS_DIR if directory is None else directory
+        # Relative directories are resolved now, against the working directory
+        self._directory = Path(directory).expanduser().absolute()
+
+    def path(self, file: str) -> Path:
+        """Return the path of a dataset file, relative ones are in the directory."""
+        return self._directory / Path(file).expanduser()
+
+    def read(self, file: str) -> Iterator[dict]:
+        """Yield the examples of a dataset file, one at a time."""
+        path = self.path(file)
+        if not path.is_file():
+            raise FileNotFoundError(
+                f"Dataset file '{file}' not found in {self._directory} (RAG_DATASETS_DIR)"
+            )
+        if path.suffix == ".parquet":
+            yield from self._read_parquet(path)
+        elif path.suffix in (".jsonl", ".ndjson"):
+            yield from self._read_jsonl(path)
+        else:
+            raise ValueError(f"Unsupported dataset file: {path}")
+
+    @staticmethod
+    def _read_jsonl(path: Path) -> Iterator[dict]:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    @staticmethod
+    def _read_parquet(path: Path) -> Iterator[dict]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ImportError(
+                f"Reading the Parquet dataset {path} requires pyarrow"
+            ) from err
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(
+            batch_size=BATCH_SIZE, columns=["instruction", "command"]
+        ):
+            for row in batch.to_pylist():
+                if isinstance(row["command"], str):
+                    row["command"] = json.loads(row["command"])
+                yield _drop_nulls(row)
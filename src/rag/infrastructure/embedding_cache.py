@@ -0,0 +1,299 @@
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+import fcntl
+from functools import cache
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import threading
+
+import numpy as np
+
+from config import settings
+from rag.infrastructure.encoder import Encoder
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of the embeddings a model gives to texts, keyed by the hash
+    of the text, so unchanged texts never go through the model again.
+
+    Embeddings are the rows of a memory-mapped float32 matrix, and an append-only
+    log maps the hash of every text to its row. When the cache is full, the row
+    of the least recently used text is given to the new one. Every model has its
+    own cache; changing its size empties it.
+    The cache is shared by the encoders of a process (see `shared_cache`), and by
+    processes, e.g. the CLI and the RAG pipeline: writes hold an exclusive lock
+    on the cache, reads a shared one, and both first replay what the other
+    processes appended to the log, so a row given to another text is never
+    read for the former one.
+    """
+
+    META_FILE = "meta.json"
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.log"
+
+    def __init__(
+        self,
+        model_name: str,
+        directory: str | os.PathLike | None = None,
+        max_entries: int | None = None,
+    ):
+        directory = settings.RAG_CACHE_DIR if directory is None else directory
+        model_dir = hashlib.sha256(model_name.encode()).hexdigest()[:16]
+        self._directory = Path(directory).expanduser() / "embeddings" / model_dir
+        # Next to the cache rather than in it, so it outlives the cache being emptied
+        self._lock_path = self._directory.with_suffix(".lock")
+        self.model_name = model_name
+        self.max_entries = max(
+            1, settings.RAG_EMBEDDING_CACHE_SIZE if max_entries is None else max_entries
+        )
+
+        self.dim: int | None = None
+        self._vectors: np.memmap | None = None
+        # Row of every cached text, from the least to the most recently used,
+        # and the text every row holds
+        self._rows: OrderedDict[str, int] = OrderedDict()
+        self._keys: dict[int, str] = {}
+        # Part of the log already replayed: the file and the offset in it
+        self._log_inode: int | None = None
+        self._log_offset = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._load()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._rows)}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @contextmanager
+    def _file_lock(self, operation: int) -> Iterator[None]:
+        """Hold the lock shared by the processes using the cache."""
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        meta_path = self._directory / self.META_FILE
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if (
+                meta["model"] != self.model_name
+                or meta["max_entries"] != self.max_entries
+            ):
+                shutil.rmtree(self._directory)
+
+        if self._open() and self._replay() > 2 * len(self._rows):
+            self._compact()
+
+    def _open(self) -> bool:
+        """Map the matrix of the embeddings, once a process has allocated it."""
+        if self._vectors is not None:
+            return True
+
+        meta_path = self._directory / self.META_FILE
+        if not meta_path.exists():
+            return False
+
+        self.dim = json.loads(meta_path.read_text(encoding="utf-8"))["dim"]
+        self._vectors = np.memmap(
+            self._directory / self.VECTORS_FILE,
+            dtype=np.float32,
+            mode="r+",
+            shape=(self.max_entries, self.dim),
+        )
+        return True
+
+    def _replay(self) -> int:
+        """
+        Replay the part of the log not read yet, returning its number of lines:
+        a row given to another text no longer holds the former. A log that was
+        compacted since is replayed from the start.
+        """
+        index_path = self._directory / self.INDEX_FILE
+        try:
+            stat = index_path.stat()
+        except FileNotFoundError:
+            return 0
+
+        if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+            self._rows.clear()
+            self._keys.clear()
+            self._log_inode = stat.st_ino
+            self._log_offset = 0
+
+        with index_path.open("rb") as f:
+            f.seek(self._log_offset)
+            content = f.read()
+        # Only whole lines, an append in progress is read the next time
+        content = content[: content.rfind(b"\n") + 1]
+        self._log_offset += len(content)
+
+        lines = content.decode().splitlines()
+        for line in lines:
+            key, row = line.split()
+            self._assign(key, int(row))
+        return len(lines)
+
+    def _assign(self, key: str, row: int) -> None:
+        former = self._keys.get(row)
+        if former is not None and former != key:
+            self._rows.pop(former, None)
+        self._rows.pop(key, None)
+        self._rows[key] = row
+        self._keys[row] = key
+
+    def _compact(self) -> None:
+        """Rewrite the log with only the rows the texts hold now."""
+        index_path = self._directory / self.INDEX_FILE
+        tmp_path = index_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.writelines(f"{key} {row}\n" for key, row in self._rows.items())
+        tmp_path.replace(index_path)
+
+        stat = index_path.stat()
+        self._log_inode = stat.st_ino
+        self._log_offset = stat.st_size
+
+    def _allocate(self, dim: int) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self._vectors = np.memmap(
+            self._directory / self.VECTORS_FILE,
+            dtype=np.float32,
+            mode="w+",
+            shape=(self.max_entries, dim),
+        )
+        (self._directory / self.INDEX_FILE).unlink(missing_ok=True)
+        self._log_inode = None
+        self._log_offset = 0
+        meta = {"model": self.model_name, "dim": dim, "max_entries": self.max_entries}
+        (self._directory / self.META_FILE).write_text(json.dumps(meta))
+
+    def get_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        """Return the cached embedding of every text hash, None for the misses."""
+        vectors = []
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            if self._open():
+                self._replay()
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    self.misses += 1
+                    vectors.append(None)
+                    continue
+                self.hits += 1
+                self._rows.move_to_end(key)
+                vectors.append(np.array(self._vectors[row]))
+        return vectors
+
+    def put_many(self, keys: list[str], vectors: np.ndarray) -> None:
+        """Cache the embeddings of the text hashes, evicting the least recently used."""
+        if not keys:
+            return
+
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            if self._open():
+                self._replay()
+            else:
+                self._allocate(vectors.shape[1])
+
+            lines = []
+            for key, vector in zip(keys, vectors, strict=True):
+                row = self._rows.get(key)
+                if row is None:
+                    if len(self._rows) < self.max_entries:
+                        row = len(self._rows)
+                    else:
+                        row = next(iter(self._rows.values()))
+                self._vectors[row] = vector
+                self._assign(key, row)
+                lines.append(f"{key} {row}\n")
+
+            # Rows are on disk before the log points at them
+            self._vectors.flush()
+            index_path = self._directory / self.INDEX_FILE
+            with index_path.open("a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+            # What was just appended needs no replay
+            stat = index_path.stat()
+            self._log_inode = stat.st_ino
+            self._log_offset = stat.st_size
+
+
+@cache
+def shared_cache(model_name: str) -> EmbeddingCache:
+    """The embedding cache of the model, shared by the whole process."""
+    return EmbeddingCache(model_name)
+
+
+class CachedEncoder:
+    """
+    Encoder that looks the texts up in the embedding cache first, and only
+    runs the model on the texts it has never seen.
+    """
+
+    def __init__(self, encoder: Encoder, cache: EmbeddingCache | None = None):
+        self.encoder = encoder
+        self.cache = shared_cache(encoder.model_name) if cache is None else cache
+
+    @property
+    def model_name(self) -> str:
+        return self.encoder.model_name
+
+    @property
+    def size(self) -> int:
+        # Known from the cache without loading the model
+        return self.cache.dim or self.encoder.size
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        keys = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Texts seen more than once in the batch are encoded once
+        missing = {}
+        for index, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[index], texts[index])
+        if missing:
+            encoded = self.encoder.encode(list(missing.values())).astype(np.float32)
+            self.cache.put_many(list(missing), encoded)
+            computed = dict(zip(missing, encoded, strict=True))
+            vectors = [
+                computed[key] if vector is None else vector
+                for key, vector in zip(keys, vectors, strict=True)
+            ]
+
+        if not vectors:
+            return np.empty((0, self.size), dtype=np.float32)
+        return np.stack(vectors)
+
+    def encode_one(self, text: str) -> list[float]:
+        return self.encode([text])[0].tolist()
+
+    def encode_many(self, texts: list[str]) -> list[list[float]]:
+        return self.encode(texts).tolist()
+
+
+def cached_encoder(model_name: str | None = None) -> CachedEncoder:
+    """Encoder of the model (the embedding model by default) behind its cache."""
+    model_name = model_name or settings.QDRANT_EMBEDDING_MODEL
+    return CachedEncoder(Encoder(model_name))
@@ -1,5 +1,7 @@
+from functools import cached_property
 import logging
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
@@ -7,12 +9,20 @@ logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
 
 class Encoder:
     def __init__(self, model_name: str):
-        self._model = SentenceTransformer(model_name)
+        self.model_name = model_name
+
+    @cached_property
+    def _model(self) -> SentenceTransformer:
+        # Loaded on first use, so encoders whose texts are all cached never load it
+        return SentenceTransformer(self.model_name)
 
     @property
     def size(self) -> int:
         return self._model.get_sentence_embedding_dimension()
 
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self._model.encode(texts, convert_to_numpy=True)
+
     def encode_one(self, text: str) -> list[float]:
         return self._model.encode(text).tolist()
 
@@ -0,0 +1,149 @@
+from loguru import logger
+from qdrant_client import AsyncQdrantClient, models
+
+from config import settings
+
+# Quantiles of the values kept when scaling them to int8, outliers are clipped
+SCALAR_QUANTILE = 0.99
+
+QUANTIZATIONS = ("", "int8", "binary")
+
+
+def hnsw_config() -> models.HnswConfigDiff:
+    return models.HnswConfigDiff(
+        m=settings.QDRANT_HNSW_M,
+        ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+    )
+
+
+def quantization_config() -> models.QuantizationConfig | None:
+    """
+    Quantization of the configured kind. The quantized vectors stay in memory
+    even when the original vectors are on disk, which is what makes it worth it.
+    """
+    kind = settings.QDRANT_QUANTIZATION.lower()
+    if kind not in QUANTIZATIONS:
+        raise ValueError(
+            f"Unknown quantization '{settings.QDRANT_QUANTIZATION}', "
+            f"expected one of: {', '.join(k for k in QUANTIZATIONS if k)}"
+        )
+
+    if kind == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=SCALAR_QUANTILE,
+                always_ram=True,
+            )
+        )
+    if kind == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+
+def vectors_config(size: int) -> models.VectorParams:
+    return models.VectorParams(
+        size=size,
+        distance=models.Distance.COSINE,
+        on_disk=settings.QDRANT_ON_DISK_VECTORS,
+    )
+
+
+def search_params() -> models.SearchParams | None:
+    """Search parameters of queries, None when they are all left to Qdrant."""
+    quantization = None
+    if quantization_config() is not None:
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.QDRANT_QUANTIZATION_RESCORE,
+            oversampling=settings.QDRANT_QUANTIZATION_OVERSAMPLING,
+        )
+
+    hnsw_ef = settings.QDRANT_HNSW_EF or None
+    if hnsw_ef is None and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+def _quantization_kind(config: models.QuantizationConfig | None) -> str:
+    if isinstance(config, models.ScalarQuantization):
+        return "int8"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    return ""
+
+
+def _current_config(info: models.CollectionInfo) -> dict:
+    vectors = info.config.params.vectors
+    return {
+        "m": info.config.hnsw_config.m,
+        "ef_construct": info.config.hnsw_config.ef_construct,
+        "quantization": _quantization_kind(info.config.quantization_config),
+        "on_disk_vectors": bool(getattr(vectors, "on_disk", False)),
+        "on_disk_payload": bool(info.config.params.on_disk_payload),
+    }
+
+
+def _wanted_config() -> dict:
+    return {
+        "m": settings.QDRANT_HNSW_M,
+        "ef_construct": settings.QDRANT_HNSW_EF_CONSTRUCT,
+        "quantization": _quantization_kind(quantization_config()),
+        "on_disk_vectors": settings.QDRANT_ON_DISK_VECTORS,
+        "on_disk_payload": settings.QDRANT_ON_DISK_PAYLOAD,
+    }
+
+
+async def ensure_collection(
+    client: AsyncQdrantClient, collection_name: str, vectors_size: int
+) -> None:
+    """
+    Create the collection with the configured index, quantization and storage,
+    or migrate an existing collection whose configuration differs.
+    A collection of vectors of another size than the model's is an error.
+    Qdrant rebuilds the index and the quantized vectors in the background,
+    the collection is searchable all along.
+    """
+    if not await client.collection_exists(collection_name):
+        await client.create_collection(
+            collection_name=collection_name,
+            vectors_config=vectors_config(vectors_size),
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config(),
+            on_disk_payload=settings.QDRANT_ON_DISK_PAYLOAD,
+        )
+        return
+
+    info = await client.get_collection(collection_name)
+    size = getattr(info.config.params.vectors, "size", vectors_size)
+    if size != vectors_size:
+        # Every upsert would fail otherwise, the collection cannot be migrated
+        raise ValueError(
+            f"Collection '{collection_name}' holds vectors of size {size}, "
+            f"the embedding model produces vectors of size {vectors_size}: "
+            f"drop or rename the collection (QDRANT_COLLECTION_NAME)"
+        )
+
+    current = _current_config(info)
+    wanted = _wanted_config()
+    if current == wanted:
+        return
+
+    changes = {
+        key: (current[key], wanted[key])
+        for key in wanted
+        if current[key] != wanted[key]
+    }
+    logger.info(f"Migrating collection '{collection_name}': {changes}")
+    await client.update_collection(
+        collection_name=collection_name,
+        vectors_config={
+            "": models.VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK_VECTORS)
+        },
+        hnsw_config=hnsw_config(),
+        quantization_config=quantization_config() or models.Disabled.DISABLED,
+        collection_params=models.CollectionParamsDiff(
+            on_disk_payload=settings.QDRANT_ON_DISK_PAYLOAD
+        ),
+    )
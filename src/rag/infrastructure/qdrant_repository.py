@@ -1,51 +1,195 @@
+import asyncio
+from uuid import UUID
+
+from loguru import logger
 from qdrant_client import AsyncQdrantClient, models
 
 from rag.domain.entities import Command
+from rag.infrastructure.command_store import CommandStore
+
+# Points read by page when scrolling, and deleted by batch
+SCROLL_LIMIT = 1024
+DELETE_BATCH_SIZE = 256
+
+# Payload field holding the hash of what the point was built from
+HASH_FIELD = "payload_hash"
+
+# Payload field telling whether the point holds the whole command ("full")
+# or only its header ("slim"), the rest of the command being in the store
+LAYOUT_FIELD = "layout"
+HEADER_FIELDS = ["id", "name", "desc"]
 
 
 class QdrantRepository:
-    def __init__(self, client: AsyncQdrantClient, collection_name: str):
+    """
+    Points of the commands in a Qdrant collection.
+
+    Given a command store, the points are slim: they only hold the header of
+    their command, which queries return without validation, and the whole
+    command is kept in the store, to be hydrated for the selected candidate only.
+    """
+
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        store: CommandStore | None = None,
+        search_params: models.SearchParams | None = None,
+    ):
         self._client = client
         self._collection_name = collection_name
+        self._store = store
+        self._search_params = search_params
+
+    @property
+    def layout(self) -> str:
+        return "full" if self._store is None else "slim"
+
+    def _payload(self, payload: Command, payload_hash: str | None = None) -> dict:
+        if self._store is None:
+            content = payload.model_dump()
+        else:
+            content = payload.model_dump(mode="json", include=set(HEADER_FIELDS))
+        content[LAYOUT_FIELD] = self.layout
+        if payload_hash is not None:
+            content[HASH_FIELD] = payload_hash
+        return content
 
     async def save_one(self, vector: list[float], payload: Command) -> bool:
-        res = await self._client.upsert(
-            collection_name=self._collection_name,
-            points=[
-                {
-                    "id": str(payload.id),
-                    "vector": vector,
-                    "payload": payload.model_dump(),
-                }
-            ],
-        )
-        return res.status == models.UpdateStatus.COMPLETED
+        return await self.save_many([vector], [payload])
 
     async def save_many(
-        self, vectors: list[list[float]], payloads: list[Command]
-    ) -> None:
+        self,
+        vectors: list[list[float]],
+        payloads: list[Command],
+        hashes: list[str] | None = None,
+    ) -> bool:
+        """
+        Upsert the points of the commands. The hash of every point, if given,
+        is stored in its payload so a later sync can tell whether it changed.
+        """
+        hashes = hashes or [None] * len(payloads)
+
+        # Commands are stored before the points that refer to them
+        if self._store is not None:
+            await asyncio.to_thread(self._store.save_many, payloads)
+
         res = await self._client.upsert(
             collection_name=self._collection_name,
             points=[
                 {
                     "id": str(payload.id),
                     "vector": vector,
-                    "payload": payload.model_dump(),
+                    "payload": self._payload(payload, payload_hash),
                 }
-                for vector, payload in zip(vectors, payloads, strict=False)
+                for vector, payload, payload_hash in zip(
+                    vectors, payloads, hashes, strict=True
+                )
             ],
         )
         return res.status == models.UpdateStatus.COMPLETED
 
+    async def hashes(self, ids: list[str] | None = None) -> dict[str, str | None]:
+        """
+        Return the hash of every point in the collection by point id, reading
+        the ids and hashes only, without the vectors and the rest of the payloads.
+        Given ids, only their points are retrieved rather than the whole
+        collection scrolled, points that do not exist being left out.
+        Points stored without a hash, with another layout or whose command is
+        missing from the store have None, so they are stored again.
+        """
+        stored = None
+        if self._store is not None:
+            stored = await asyncio.to_thread(self._store.ids)
+
+        if ids is not None:
+            points = []
+            for i in range(0, len(ids), SCROLL_LIMIT):
+                points += await self._client.retrieve(
+                    collection_name=self._collection_name,
+                    ids=ids[i : i + SCROLL_LIMIT],
+                    with_payload=[HASH_FIELD, LAYOUT_FIELD],
+                    with_vectors=False,
+                )
+            return dict(self._hash(point, stored) for point in points)
+
+        hashes = {}
+        offset = None
+        while True:
+            points, offset = await self._client.scroll(
+                collection_name=self._collection_name,
+                limit=SCROLL_LIMIT,
+                offset=offset,
+                with_payload=[HASH_FIELD, LAYOUT_FIELD],
+                with_vectors=False,
+            )
+            hashes.update(self._hash(point, stored) for point in points)
+            if offset is None:
+                return hashes
+
+    def _hash(
+        self, point: models.Record, stored: set[str] | None
+    ) -> tuple[str, str | None]:
+        """The id of the point and its hash, None if it is not current."""
+        point_id = str(point.id)
+        payload = point.payload or {}
+        current = payload.get(LAYOUT_FIELD, "full") == self.layout and (
+            stored is None or point_id in stored
+        )
+        return point_id, payload.get(HASH_FIELD) if current else None
+
+    async def delete_many(
+        self, ids: list[str], batch_size: int = DELETE_BATCH_SIZE
+    ) -> int:
+        """Delete the points of the given ids by batches, returning how many."""
+        for i in range(0, len(ids), batch_size):
+            await self._client.delete(
+                collection_name=self._collection_name,
+                points_selector=models.PointIdsList(points=ids[i : i + batch_size]),
+            )
+        if self._store is not None:
+            await asyncio.to_thread(self._store.delete_many, ids)
+        return len(ids)
+
     async def get(self, query: list[float], limit: int = 10) -> list[(float, Command)]:
         response = await self._client.query_points(
             collection_name=self._collection_name,
             query=query,
             limit=limit,
+            search_params=self._search_params,
+            with_payload=True if self._store is None else HEADER_FIELDS,
         )
 
         hits = response.points
         if not hits:
             return []
 
-        return [(hit.score, Command.model_validate(hit.payload)) for hit in hits]
+        if self._store is None:
+            return [(hit.score, Command.model_validate(hit.payload)) for hit in hits]
+
+        # Headers come from our own points, they need no validation
+        return [
+            (
+                hit.score,
+                Command.model_construct(
+                    id=UUID(str(hit.id)),
+                    name=hit.payload.get("name", ""),
+                    desc=hit.payload.get("desc", ""),
+                ),
+            )
+            for hit in hits
+        ]
+
+    async def hydrate(self, command: Command) -> Command:
+        """
+        Return the whole command of a query result, read from the store for
+        slim points. Without it in the store, the header is all there is.
+        """
+        if self._store is None or not command:
+            return command
+
+        hydrated = await asyncio.to_thread(self._store.get, str(command.id))
+        if hydrated is None:
+            logger.warning(f"Command '{command.name}' is missing from the store")
+            return command
+        return hydrated
@@ -0,0 +1,118 @@
+from collections.abc import Callable
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+import dspy
+
+from config import settings
+
+# Bump when a cached stage gives a different result for the same inputs,
+# e.g. after a change to the parser, so the results cached before are ignored
+CACHE_VERSION = 1
+
+
+def fingerprint(*parts) -> str:
+    """Hash of the given inputs of a stage, which must be JSON serializable."""
+    payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def llm_fingerprint() -> dict:
+    """
+    The language model the programs run on, along with its settings
+    (e.g. the endpoint and temperature), since they shape what programs learn.
+    """
+    lm = dspy.settings.lm
+    if lm is None:
+        return {"model": settings.LLM_NAME, "api_base": settings.LLM_ENDPOINT}
+    return {"model": lm.model, **lm.kwargs}
+
+
+class StepCache:
+    """
+    Persistent cache of the results of a RAG pipeline stage, keyed by the hash
+    of the inputs they were computed from (see `fingerprint`), so the commands
+    that did not change since the last run are not processed again.
+
+    Every stage has its own directory with one entry per key: a JSON document,
+    a saved DSPy program, or an empty marker for stages that only have effects.
+    """
+
+    def __init__(self, stage: str, directory: str | os.PathLike | None = None):
+        directory = settings.RAG_CACHE_DIR if directory is None else directory
+        self._directory = Path(directory).expanduser() / stage
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _path(self, key: str) -> Path:
+        return self._directory / key
+
+    def _count(self, hit: bool) -> bool:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return hit
+
+    def _write(self, key: str, content: str) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        tmp_path.replace(path)
+
+    def has(self, key: str) -> bool:
+        """Whether the stage already ran on the inputs of the key."""
+        return self._count(self._path(key).exists())
+
+    def mark(self, key: str) -> None:
+        """Record that the stage ran on the inputs of the key."""
+        self._write(key, "")
+
+    def get(self, key: str):
+        """Return the JSON result cached for the key, or None."""
+        path = self._path(key)
+        if not self._count(path.is_file()):
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def put(self, key: str, value) -> None:
+        """Cache the JSON result of the key."""
+        self._write(key, json.dumps(value, default=str))
+
+    def get_program(self, key: str) -> dspy.Module | None:
+        """Return the DSPy program cached for the key, or None."""
+        path = self._path(key)
+        if not self._count(path.is_dir()):
+            return None
+        return dspy.load(str(path))
+
+    def put_program(self, key: str, program: dspy.Module) -> None:
+        """Cache the DSPy program of the key, with its architecture and state."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # DSPy only saves whole programs to directories without a suffix
+        tmp_path = Path(tempfile.mkdtemp(dir=self._directory, prefix="tmp-"))
+        try:
+            program.save(str(tmp_path), save_program=True)
+            if path.exists():
+                shutil.rmtree(path)
+            tmp_path.rename(path)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def program(self, key: str, build: Callable[[], dspy.Module]) -> dspy.Module:
+        """Return the DSPy program cached for the key, building and caching it if none."""
+        program = self.get_program(key)
+        if program is None:
+            program = build()
+            self.put_program(key, program)
+        return program
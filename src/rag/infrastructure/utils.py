@@ -1,29 +1,119 @@
+import asyncio
 from contextlib import asynccontextmanager
+from functools import cache
+import hashlib
+from pathlib import Path
 
 import dspy
-from qdrant_client import AsyncQdrantClient, models
+from qdrant_client import AsyncQdrantClient
 
 from config import settings
+from rag.infrastructure.command_store import CommandStore
+from rag.infrastructure.qdrant_config import ensure_collection, search_params
+from rag.infrastructure.qdrant_repository import QdrantRepository
+from shared.infrastructure.runtime import resource
 
+# Collections created or migrated by the process, by server, name and vector size,
+# and the bootstraps in progress, awaited by the clients that need them meanwhile
+_bootstrapped: set[tuple[str, str, int]] = set()
+_bootstrapping: dict[tuple[str, str, int], asyncio.Task] = {}
+
+
+def connect_qdrant(prefer_grpc: bool | None = None) -> AsyncQdrantClient:
+    """
+    Client of the configured Qdrant server, over gRPC if so configured.
+    Connections are opened lazily by the first request.
+    """
+    if prefer_grpc is None:
+        prefer_grpc = settings.QDRANT_PREFER_GRPC
+    return AsyncQdrantClient(
+        url=settings.QDRANT_CLIENT_URL,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        prefer_grpc=prefer_grpc,
+    )
 
-@asynccontextmanager
-async def qdrant_client(vectors_size: int):
-    client = AsyncQdrantClient(url=settings.QDRANT_CLIENT_URL)
-    collection_name = settings.QDRANT_COLLECTION_NAME
 
-    if not await client.collection_exists(collection_name):
-        await client.create_collection(
-            collection_name=collection_name,
-            vectors_config=models.VectorParams(
-                size=vectors_size,
-                distance=models.Distance.COSINE,
-            ),
-        )
+async def _connect_qdrant() -> AsyncQdrantClient:
+    return connect_qdrant()
 
+
+async def _ensure_collection(
+    key: tuple[str, str, int], client: AsyncQdrantClient, vectors_size: int
+) -> None:
     try:
-        yield client
+        await ensure_collection(client, settings.QDRANT_COLLECTION_NAME, vectors_size)
+        _bootstrapped.add(key)
     finally:
-        await client.close()
+        if _bootstrapping.get(key) is asyncio.current_task():
+            del _bootstrapping[key]
+
+
+async def _bootstrap(client: AsyncQdrantClient, vectors_size: int) -> None:
+    """
+    Create or migrate the collection once per process: the collection outlives
+    the clients, so later clients skip the round-trips. Clients that need it
+    while it is in progress wait for it rather than bootstrap it again.
+    """
+    key = (settings.QDRANT_CLIENT_URL, settings.QDRANT_COLLECTION_NAME, vectors_size)
+    if key in _bootstrapped:
+        return
+
+    task = _bootstrapping.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.create_task(_ensure_collection(key, client, vectors_size))
+        _bootstrapping[key] = task
+    # A client that stops waiting does not cancel the bootstrap of the others
+    await asyncio.shield(task)
+
+
+@asynccontextmanager
+async def qdrant_client(vectors_size: int):
+    """
+    Yield the Qdrant client pooled on the running event loop, so its connections
+    are kept alive from one use to the next.
+    The collection is created, or migrated to the configured index and storage,
+    once per process, not on every use.
+    """
+    client = await resource(
+        "qdrant", _connect_qdrant, close=lambda client: client.close()
+    )
+    await _bootstrap(client, vectors_size)
+    yield client
+
+
+def _command_store_path(url: str, collection_name: str) -> Path:
+    """
+    File of the command store of a collection, one per server too, since
+    collections of the same name on other servers hold other points.
+    """
+    directory = Path(settings.QDRANT_COMMAND_STORE_DIR).expanduser()
+    server = hashlib.sha256(url.encode()).hexdigest()[:12]
+    return directory / f"{collection_name}-{server}.sqlite"
+
+
+@cache
+def _command_store(url: str, collection_name: str) -> CommandStore:
+    return CommandStore(_command_store_path(url, collection_name))
+
+
+def qdrant_repository(client: AsyncQdrantClient) -> QdrantRepository:
+    """
+    Repository of the configured collection, whose points are slim
+    and backed by the command store if so configured, searched with the
+    configured HNSW and quantization parameters.
+    With full points, the store of the collection is of no use and would
+    be stale once the points are slim again, so it is deleted.
+    """
+    url = settings.QDRANT_CLIENT_URL
+    collection_name = settings.QDRANT_COLLECTION_NAME
+    if settings.QDRANT_SLIM_PAYLOADS:
+        store = _command_store(url, collection_name)
+    else:
+        store = None
+        path = _command_store_path(url, collection_name)
+        for file in (path, *path.parent.glob(f"{path.name}-*")):
+            file.unlink(missing_ok=True)
+    return QdrantRepository(client, collection_name, store, search_params())
 
 
 def configure_llm(model_name: str, endpoint: str, temperature: float = 0.0):
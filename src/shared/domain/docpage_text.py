@@ -0,0 +1,81 @@
+import re
+import shlex
+
+# Any subheading (## ...), the text of the heading is its section name
+SUBHEADING_RE = re.compile(r"^(##+)\s+(.*)")
+
+# Group 1 = long flag, group 2 = optional short flag
+FLAG_FORMS_RE = re.compile(r"(`--[^,`]+)(?:,\s*-(\w))?")
+
+# Group 1 = prompt of an example line, group 2 = the command itself
+EXAMPLE_LINE_RE = re.compile(r"^(\s*> ?)(.*)")
+
+# Tokens that would not come back unchanged if they were joined and split again
+RESPLIT_RE = re.compile(r"[\s'\"\\]")
+
+# Sections of a docpage that are kept when it is cleaned
+ALLOWED_SUBHEADINGS = frozenset({"signature", "flags", "examples"})
+
+
+def strip_short_forms(line: str, synonyms: dict[str, str]) -> str:
+    """
+    Removes the short form (', -x') of the flags on a line of the 'Flags' section,
+    recording the long flag of every short flag in `synonyms`.
+    """
+
+    def repl(m):
+        long_flag = m.group(1)
+        short_flag = m.group(2)
+        # Record mapping for example normalization (strip backticks)
+        if short_flag:
+            synonyms[f"-{short_flag}"] = long_flag.strip("`")
+        # Return only long flag (keep backticks for markdown)
+        return long_flag
+
+    return FLAG_FORMS_RE.sub(repl, line)
+
+
+def split_example(line: str) -> tuple[str, list[str]]:
+    """Splits an example line into its prompt and its shell tokens."""
+    prefix_match = EXAMPLE_LINE_RE.match(line)
+    if prefix_match:
+        prefix, cmd_text = prefix_match.groups()
+    else:
+        prefix, cmd_text = "", line
+    return prefix, shlex.split(cmd_text)
+
+
+def expand_combined_short_flags(tokens: list[str]) -> list[str]:
+    """
+    Expands combined short flags, e.g. '-am' becomes '-a -m'.
+    Only affects tokens starting with '-' and having multiple letters.
+    """
+    expanded_tokens = []
+    for tok in tokens:
+        if tok.startswith("-") and not tok.startswith("--") and len(tok) > 2:
+            expanded_tokens.extend([f"-{c}" for c in tok[1:]])
+        else:
+            expanded_tokens.append(tok)
+    return expanded_tokens
+
+
+def needs_resplit(tokens: list[str]) -> bool:
+    """
+    Whether the tokens were unquoted when their line was split, so joining
+    and splitting them again would not give them back.
+    """
+    return any(not tok or RESPLIT_RE.search(tok) for tok in tokens)
+
+
+def normalize_example(
+    prefix: str, tokens: list[str], synonyms: dict[str, str]
+) -> tuple[str, list[str]]:
+    """
+    Replaces the short flags of an example with their long flags, returning
+    the rewritten line along with its tokens.
+    """
+    if needs_resplit(tokens):
+        # The tokens are split again from the rewritten line, as they are displayed
+        prefix, tokens = split_example(prefix + " ".join(tokens))
+    tokens = [synonyms.get(tok, tok) for tok in tokens]
+    return prefix + " ".join(tokens), tokens
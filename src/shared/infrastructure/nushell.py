@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+# `help commands` lacks the examples and the short forms of the flags,
+# `scope commands` reports both along with the signatures
+NU_CATALOG_COMMAND = "scope commands | to json --raw"
+
+
+class NuCatalog:
+    """
+    Commands reported by the locally installed Nushell, along with their
+    signatures and examples, as `scope commands` reports them.
+
+    The whole catalog is read by a single `nu` call, the first time
+    it is requested, then kept for the lifetime of the catalog.
+    """
+
+    def __init__(self, binary: str = "nu"):
+        self._binary = binary
+        self._commands: dict[str, dict] | None = None
+        self._lock = asyncio.Lock()
+
+    async def commands(self) -> dict[str, dict]:
+        """Return every command reported by Nushell, keyed by name."""
+        async with self._lock:
+            if self._commands is None:
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        self._binary,
+                        "--no-config-file",
+                        "--commands",
+                        NU_CATALOG_COMMAND,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                except OSError as err:
+                    raise RuntimeError(
+                        f"Failed to run '{self._binary}': {err}"
+                    ) from err
+
+                stdout, stderr = await process.communicate()
+                if process.returncode != 0:
+                    raise RuntimeError(
+                        f"Nushell introspection failed: {stderr.decode().strip()}"
+                    )
+
+                self._commands = {
+                    record["name"]: record for record in json.loads(stdout)
+                }
+
+        return self._commands
@@ -0,0 +1,53 @@
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import NamedTuple
+
+CHUNK_SIZE = 16
+
+
+class Outcome[T](NamedTuple):
+    """The result of processing one item: either a value or an error message."""
+
+    value: T | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _run_chunk[T, R](func: Callable[[T], R], chunk: Sequence[T]) -> list[Outcome[R]]:
+    outcomes = []
+    for item in chunk:
+        try:
+            outcomes.append(Outcome(func(item)))
+        except Exception as err:
+            outcomes.append(Outcome(error=f"{type(err).__name__}: {err}"))
+    return outcomes
+
+
+def parallel_map[T, R](
+    func: Callable[[T], R],
+    items: Sequence[T],
+    workers: int | None = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> list[Outcome[R]]:
+    """
+    Apply the function to every item, in chunks fanned out to a pool of
+    `workers` processes (all CPUs if None, no pool at all if 1).
+    The function must be picklable, i.e. defined at module level.
+
+    Outcomes are returned in the order of the items, and an item that fails
+    is reported in its outcome instead of failing the whole batch.
+    """
+    chunk_size = max(1, chunk_size)
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    if workers == 1 or len(chunks) <= 1:
+        results = map(_run_chunk, repeat(func), chunks)
+        return [outcome for chunk in results for outcome in chunk]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_run_chunk, repeat(func), chunks)
+        return [outcome for chunk in results for outcome in chunk]
@@ -0,0 +1,112 @@
+import asyncio
+import atexit
+from collections.abc import Awaitable, Callable, Coroutine
+import threading
+from typing import Any
+import weakref
+
+from loguru import logger
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_lock = threading.Lock()
+
+
+class _Pool:
+    """Clients created on one event loop, which they are bound to."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.resources: dict[str, Any] = {}
+        self.closers: dict[str, Callable[[Any], Awaitable[Any]]] = {}
+
+
+_pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pool] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop, starting it in a background thread
+    the first time it is needed.
+    """
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="clai-runtime", daemon=True
+            )
+            _loop_thread.start()
+            atexit.register(shutdown)
+
+    return _loop
+
+
+def run[R](coro: Coroutine[Any, Any, R]) -> R:
+    """
+    Run the coroutine on the process-wide event loop and wait for its result.
+    Unlike `asyncio.run`, the loop outlives the call so the clients pooled
+    on it are reused by the next call.
+    """
+    loop = event_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run() cannot be called from the runtime event loop.")
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def resource[T](
+    name: str,
+    factory: Callable[[], Awaitable[T]],
+    close: Callable[[T], Awaitable[Any]] | None = None,
+) -> T:
+    """
+    Return the client registered under the given name for the running event loop,
+    creating it with the factory the first time it is requested.
+    The optional closer is awaited when the pool is closed.
+    """
+    pool = _pools.setdefault(asyncio.get_running_loop(), _Pool())
+
+    async with pool.lock:
+        if name not in pool.resources:
+            pool.resources[name] = await factory()
+            if close is not None:
+                pool.closers[name] = close
+
+    return pool.resources[name]
+
+
+async def close_resources() -> None:
+    """Close every client pooled on the running event loop."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is None:
+        return
+
+    for name, resource in pool.resources.items():
+        close = pool.closers.get(name)
+        if close is None:
+            continue
+        try:
+            await close(resource)
+        except Exception as err:
+            logger.opt(exception=err).warning(f"Failed to close '{name}'")
+
+
+def shutdown() -> None:
+    """Close the pooled clients and stop the process-wide event loop."""
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None:
+            return
+        loop, thread = _loop, _loop_thread
+        _loop = _loop_thread = None
+
+    asyncio.run_coroutine_threadsafe(close_resources(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
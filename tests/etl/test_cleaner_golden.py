@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+
+from etl.domain.services import MarkdownCleanerService
+
+DOCPAGES_DIR = Path(__file__).with_name("docpages")
+
+# Output of the cleaner that ran one pass per cleaning step, before it was fused
+GOLDEN_DIR = Path(__file__).with_name("golden")
+
+DOCPAGES = sorted(DOCPAGES_DIR.glob("*.md"))
+
+
+@pytest.mark.parametrize("docpage", DOCPAGES, ids=lambda path: path.stem)
+def test_clean_matches_golden_output(docpage: Path):
+    cleaned = MarkdownCleanerService(docpage.read_text(encoding="utf-8")).clean()
+    assert cleaned == (GOLDEN_DIR / docpage.name).read_text(encoding="utf-8")
+
+
+def test_every_docpage_has_a_golden_output():
+    assert DOCPAGES
+    assert {path.name for path in DOCPAGES} == {
+        path.name for path in GOLDEN_DIR.glob("*.md")
+    }
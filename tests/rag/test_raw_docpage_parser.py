@@ -0,0 +1,131 @@
+from pathlib import Path
+
+import pytest
+
+from etl.domain.services import MarkdownCleanerService
+from rag.domain.services.docpage_parser import DocpageParser
+from rag.domain.services.raw_docpage_parser import RawDocpageParser
+
+DOCPAGES_DIR = Path(__file__).parents[1] / "etl" / "docpages"
+
+# Examples whose tokens are unquoted, piped or prompted again once split
+EDGE_CASES = {
+    "quoted": """# `open` for filesystem
+
+Load a file.
+
+## Flags
+
+ -  `--raw, -r`: open file as raw binary
+
+## Examples
+
+Open a file with spaces in its name
+```nu
+> open -r 'my file.txt'
+```
+""",
+    # The example cannot be split again once cleaned, both paths fail on it
+    "unbalanced": """# `open` for filesystem
+
+Load a file.
+
+## Flags
+
+ -  `--raw, -r`: open file as raw binary
+
+## Examples
+
+Open a file named after a quote
+```nu
+> open "it's" -r
+```
+""",
+    "escaped": """# `str replace` for strings
+
+Replace text.
+
+## Flags
+
+ -  `--all, -a`: replace all occurrences
+ -  `--regex, -r`: match a regular expression
+
+## Examples
+
+Replace a backslash
+```nu
+> str replace -ar '\\\\' '/'
+```
+
+Replace an empty string
+```nu
+> str replace -a '' x
+```
+
+Reprompted example
+```nu
+> > str replace -a a b
+```
+""",
+    "piped": """# `sort` for filters
+
+Sort a list.
+
+## Flags
+
+ -  `--reverse, -r`: Sort in reverse order
+
+## Examples
+
+Sort and count
+```nu
+> [3 1 2] | sort -r | length
+```
+""",
+    "no-flags": """[Skip](#main)
+
+# `pwd` for filesystem
+
+Print the current directory.
+
+## Signature
+
+```> pwd ```
+
+## Examples
+
+Print it
+```nu
+> pwd
+```
+""",
+}
+
+
+DOCPAGES = [
+    pytest.param(path.read_text(encoding="utf-8"), id=path.stem)
+    for path in sorted(DOCPAGES_DIR.glob("*.md"))
+] + [pytest.param(doc, id=name) for name, doc in EDGE_CASES.items()]
+
+
+def _outcome(parse, raw_doc: str):
+    """The command parsed from the docpage, or the type of the error raised."""
+    try:
+        return parse(raw_doc)
+    except Exception as err:
+        return type(err)
+
+
+def _clean_then_parse(raw_doc: str):
+    return DocpageParser().parse(MarkdownCleanerService(raw_doc).clean())
+
+
+@pytest.mark.parametrize("raw_doc", DOCPAGES)
+def test_parse_raw_matches_clean_then_parse(raw_doc: str):
+    expected = _outcome(_clean_then_parse, raw_doc)
+    assert _outcome(RawDocpageParser().parse_raw, raw_doc) == expected
+
+
+def test_parse_raw_without_heading_fails():
+    with pytest.raises(ValueError):
+        RawDocpageParser().parse_raw("No heading at all")